@@ -0,0 +1,415 @@
+# pylint: disable=missing-module-docstring, c0301
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from igraph import Graph
+
+from budget import Budget, BudgetExceeded
+from evaluate import check, evaluate
+from formula_functions import depth_formula, minimize_formula, negate_formula
+from graph_functions import (
+    color_graph,
+    isomorphic_in_list,
+    lists_same,
+    reset_edge_attributes,
+    unfold_graph,
+)
+from graph_handle import GraphHandle
+from lts import IndexedLTS
+from main import iter_synthesis, synthesis, synthesis_cache
+from parse import parse
+from vector_evaluate import VectorLTS
+
+# parameters of the family every sweep starts from
+BASE_PARAMETERS = {
+    "branching": 2,
+    "depth": 4,
+    "labels": 2,
+    "cycle_density": 0.0,
+    "formula_depth": 2,
+    "formula_width": 2,
+}
+
+# values of one parameter, the others keep their base values
+SWEEPS = {
+    "branching": [1, 2, 3, 4, 5],
+    "depth": [1, 2, 4, 6, 8],
+    "labels": [1, 2, 3, 4],
+    "cycle_density": [0.0, 0.25, 0.5, 1.0, 2.0],
+    "formula_depth": [1, 2, 3],
+    "formula_width": [1, 2, 3, 4],
+}
+
+OPERATIONS = ("unfold", "synthesis", "dedup", "evaluate", "vector_evaluate", "check")
+
+
+def family_graph(branching, depth, labels, cycle_density, seed=0):
+    """Returns a graph of the benchmark family, a complete tree with extra edges that close cycles.
+
+    Parameters:
+        branching (int): Number of children of every inner node
+        depth (int): Number of edges on the paths from the root to the leaves
+        labels (int): Number of labels, the labels of the tree edges cycle through them
+        cycle_density (float): Number of extra edges per tree edge, each from a random node to a random node that is not deeper
+        seed (int): Seed of the extra edges
+
+    Returns:
+        graph (igraph.Graph): The graph with initial node 0
+    """
+
+    # nodes are numbered level by level, so the nodes up to level k are a prefix
+    levels = [0]
+    edges = []
+    node = 0
+    while node < len(levels):
+        if levels[node] < depth:
+            for _ in range(branching):
+                edges.append((node, len(levels)))
+                levels.append(levels[node] + 1)
+        node += 1
+    edge_labels = [_label(edge % labels) for edge in range(len(edges))]
+
+    level_ends = [levels.count(level) for level in range(depth + 1)]
+    for level in range(1, depth + 1):
+        level_ends[level] += level_ends[level - 1]
+    rng = random.Random(seed)
+    for _ in range(round(cycle_density * len(edges))):
+        source = rng.randrange(len(levels))
+        edges.append((source, rng.randrange(level_ends[levels[source]])))
+        edge_labels.append(_label(rng.randrange(labels)))
+
+    graph = Graph(n=len(levels), edges=edges, directed=True)
+    graph.vs["id"] = ["n%d" % vertex for vertex in range(graph.vcount())]
+    if edges:
+        graph.es["label"] = edge_labels
+        graph.es["id"] = ["e%d" % edge for edge in range(len(edges))]
+    graph["initial"] = 0
+    return graph
+
+
+def family_formula(depth, width, labels):
+    """Returns a formula of the benchmark family, a full tree of modalities joined by alternating and and or.
+
+    Parameters:
+        depth (int): Modal depth, at least 1
+        width (int): Number of modalities joined on every level
+        labels (int): Number of labels, the modalities of a level cycle through them
+
+    Returns:
+        formula_str (str): The formula in string representation
+    """
+
+    # below the innermost modalities are true and false, <a>false and [a]true would be trivial
+    if depth == 1:
+        possible_subformula, necessary_subformula = "true", "false"
+    else:
+        possible_subformula = necessary_subformula = family_formula(
+            depth - 1, width, labels
+        )
+    parts = [
+        (
+            "<%s>%s" % (_label(index % labels), possible_subformula)
+            if (depth + index) % 2
+            else "[%s]%s" % (_label(index % labels), necessary_subformula)
+        )
+        for index in range(width)
+    ]
+    operator = "and" if depth % 2 else "or"
+    formula_str = parts[0]
+    for part in parts[1:]:
+        formula_str = "(%s %s %s)" % (formula_str, operator, part)
+    return formula_str
+
+
+def _label(number):
+    # label number i of a family
+    return chr(ord("a") + number)
+
+
+def _measure(operation, repeat, setup=None):
+    # seconds of every run of operation, setup is called before each run and not timed
+    seconds = []
+    for _ in range(repeat):
+        arguments = setup() if setup is not None else ()
+        start = time.perf_counter()
+        operation(*arguments)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def benchmark_case(parameters, repeat=3, operations=OPERATIONS, timeout=None):
+    """Returns the run times of the operations on one member of the benchmark family.
+
+    The operations are timed separately: unfold_graph to the depth of the formula, synthesis with the formula and its negation on the unfolded graph, dedup of the synthesis results with isomorphic_in_list and lists_same, and checking the formula on the input graph with evaluate, the VectorLTS and check. With a timeout, synthesis runs lazily through iter_synthesis with a Budget, so a case past a performance cliff stops and its record names the exceeded limit instead of stalling the whole suite. The lazy runs are slower, so only records with the same timeout are comparable.
+
+    Parameters:
+        parameters (dict): Values of the keys of BASE_PARAMETERS
+        repeat (int): Number of runs of every operation
+        operations ([str]): Names of the operations to time, from OPERATIONS
+        timeout (float): Seconds after which a synthesis run stops, no limit if None
+
+    Returns:
+        records ([dict]): One record per operation with its name, the seconds of every run, the best run, the sizes of the inputs and outputs and the limit a synthesis run exceeded
+    """
+
+    graph = family_graph(
+        parameters["branching"],
+        parameters["depth"],
+        parameters["labels"],
+        parameters["cycle_density"],
+    )
+    formula = minimize_formula(
+        parse(
+            family_formula(
+                parameters["formula_depth"],
+                parameters["formula_width"],
+                parameters["labels"],
+            )
+        )
+    )
+    negated_formula = negate_formula(formula)
+    color_graph(graph)
+    unfolded_graph = unfold_graph(graph, depth_formula(formula))
+    reset_edge_attributes(unfolded_graph)
+
+    # limits hit by the synthesis runs, None for a run that finished
+    exceeded = []
+
+    def synthesize():
+        synthesis_cache.clear()
+        if timeout is None:
+            return synthesis([GraphHandle(unfolded_graph)], formula) + synthesis(
+                [GraphHandle(unfolded_graph)], negated_formula
+            )
+
+        budget = Budget(timeout=timeout)
+        results = []
+        try:
+            for synthesis_formula in (formula, negated_formula):
+                results.extend(
+                    iter_synthesis(
+                        [GraphHandle(unfolded_graph)], synthesis_formula, budget
+                    )
+                )
+        except BudgetExceeded:
+            pass
+        exceeded.append(budget.exceeded)
+        return results
+
+    def dedup(result_graphs):
+        unique_graphs = []
+        for result_graph in result_graphs:
+            if not isomorphic_in_list(result_graph, unique_graphs):
+                unique_graphs.append(result_graph)
+        lists_same(unique_graphs, result_graphs)
+
+    lts = IndexedLTS.from_igraph(graph)
+    vector_lts = VectorLTS.from_lts(lts)
+    sizes = {
+        "nodes": graph.vcount(),
+        "edges": graph.ecount(),
+        "formula_size": formula.size,
+        "unfolded_nodes": unfolded_graph.vcount(),
+    }
+    operation_arguments = {
+        "unfold": (lambda: unfold_graph(graph, depth_formula(formula)), None),
+        "synthesis": (synthesize, None),
+        "evaluate": (lambda: evaluate(formula, lts), None),
+        "vector_evaluate": (
+            lambda: vector_lts.states(vector_lts.satisfying_bitmap(formula)),
+            None,
+        ),
+        "check": (lambda: check(formula, lts, str(graph["initial"])), None),
+    }
+    if "dedup" in operations:
+        result_graphs = [handle.pruned().to_graph() for handle in synthesize()]
+        sizes["results"] = len(result_graphs)
+        exceeded.clear()
+        # fresh copies, so the data isomorphic_in_list caches per graph is computed in every run
+        operation_arguments["dedup"] = (
+            dedup,
+            lambda: ([result_graph.copy() for result_graph in result_graphs],),
+        )
+
+    records = []
+    for name in operations:
+        operation, setup = operation_arguments[name]
+        seconds = _measure(operation, repeat, setup)
+        records.append(
+            {
+                "operation": name,
+                "parameters": dict(parameters),
+                "seconds": seconds,
+                "best": min(seconds),
+                "sizes": sizes,
+                "timeout": timeout,
+                "exceeded": (
+                    next(filter(None, exceeded), None) if name == "synthesis" else None
+                ),
+            }
+        )
+    return records
+
+
+def run_benchmarks(
+    sweeps=None, repeat=3, operations=OPERATIONS, output=None, timeout=None
+):
+    """Runs the sweeps of the benchmark family and returns all records.
+
+    Parameters:
+        sweeps ([str]): Names of the sweeps in SWEEPS to run, all if None
+        repeat (int): Number of runs of every operation
+        operations ([str]): Names of the operations to time, from OPERATIONS
+        output (file): File the records are written to as JSON Lines as soon as a case is done, nothing is written if None
+        timeout (float): Seconds after which a synthesis run stops, no limit if None
+
+    Returns:
+        records ([dict]): One record per sweep value and operation, with the sweep, the commit and the Python version
+    """
+
+    environment = {"commit": _commit(), "python": platform.python_version()}
+    records = []
+    for sweep in sweeps or SWEEPS:
+        for value in SWEEPS[sweep]:
+            parameters = dict(BASE_PARAMETERS, **{sweep: value})
+            for record in benchmark_case(parameters, repeat, operations, timeout):
+                record = dict(record, sweep=sweep, **environment)
+                records.append(record)
+                if output is not None:
+                    output.write(json.dumps(record) + "\n")
+                    output.flush()
+    return records
+
+
+def _commit():
+    # commit the checkout of this file is at, None outside of a git repository
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(baseline_records, records):
+    """Returns the ratio of the best run times of two runs of the benchmarks.
+
+    Parameters:
+        baseline_records ([dict]): Records of the earlier run
+        records ([dict]): Records of the later run
+
+    Returns:
+        ratios ([(str, str, dict, float)]): Sweep, operation, parameters and later best time divided by the earlier one, for the records in both runs with the same timeout
+    """
+
+    def key(record):
+        return (
+            record["sweep"],
+            record["operation"],
+            tuple(sorted(record["parameters"].items())),
+            record["timeout"],
+        )
+
+    baseline = {key(record): record["best"] for record in baseline_records}
+    return [
+        (
+            record["sweep"],
+            record["operation"],
+            record["parameters"],
+            record["best"] / baseline[key(record)] if baseline[key(record)] else 1.0,
+        )
+        for record in records
+        if key(record) in baseline
+    ]
+
+
+def read_results(path):
+    """Returns the records of a file written by run_benchmarks."""
+    with open(path, encoding="utf-8") as result_file:
+        return [json.loads(line) for line in result_file if line.strip()]
+
+
+def main(argv=None):
+    """Runs the benchmarks from the command line, see python -m benchmark --help.
+
+    Parameters:
+        argv ([str]): Arguments without the program name, sys.argv[1:] if None
+
+    Returns:
+        exit_code (int): 0
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark",
+        description="Times unfolding, synthesis, dedup and model checking on parameterized graph and formula families.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="JSON Lines file for the records, '-' for stdout (default: -)",
+    )
+    parser.add_argument(
+        "--sweep",
+        action="append",
+        choices=list(SWEEPS),
+        help="parameter to vary, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--operation",
+        action="append",
+        choices=OPERATIONS,
+        help="operation to time, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs of every operation (default: 3)"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="seconds after which a synthesis run stops, synthesis runs lazily if given",
+    )
+    parser.add_argument(
+        "--baseline",
+        help="records of an earlier run, the ratios of the best run times are printed to stderr",
+    )
+    arguments = parser.parse_args(argv)
+    if arguments.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    operations = arguments.operation or OPERATIONS
+    if arguments.output == "-":
+        records = run_benchmarks(
+            arguments.sweep, arguments.repeat, operations, sys.stdout, arguments.timeout
+        )
+    else:
+        with open(arguments.output, "w", encoding="utf-8") as output:
+            records = run_benchmarks(
+                arguments.sweep, arguments.repeat, operations, output, arguments.timeout
+            )
+
+    if arguments.baseline:
+        for sweep, operation, parameters, ratio in compare_results(
+            read_results(arguments.baseline), records
+        ):
+            print(
+                "%s=%s %s: %.2fx" % (sweep, parameters[sweep], operation, ratio),
+                file=sys.stderr,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
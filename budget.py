@@ -0,0 +1,98 @@
+# pylint: disable=missing-module-docstring, c0301
+
+import threading
+import time
+
+
+class BudgetExceeded(Exception):
+    """Raised inside synthesis when a limit of its budget is exceeded.
+
+    Parameters:
+        limit (str): The limit that was exceeded, one of Budget.LIMITS
+    """
+
+    def __init__(self, limit):
+        super().__init__("synthesis budget exceeded: " + limit)
+        self.limit = limit
+
+
+class Budget:
+    """Limits on the work of a synthesis run, checked in every loop of synthesis.
+
+    A budget is used up by one run. Once a limit is hit, exceeded names it and synthesis stops with the results found so far.
+
+    Parameters:
+        timeout (float): Seconds from now until the deadline, no deadline if None
+        max_live_graphs (int): Maximum number of graphs waiting in the work queues of synthesis at the same time, no limit if None
+        max_results (int): Maximum number of satisfying and non satisfying results together, no limit if None
+        cancel_event (threading.Event): Event that cancels synthesis when set, any object with an is_set method works
+    """
+
+    LIMITS = ("cancelled", "deadline", "live_graphs", "results")
+
+    def __init__(
+        self, timeout=None, max_live_graphs=None, max_results=None, cancel_event=None
+    ):
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.max_live_graphs = max_live_graphs
+        self.max_results = max_results
+        self.cancel_event = threading.Event() if cancel_event is None else cancel_event
+        self.live_graphs = 0
+        self.results = 0
+        self.exceeded = None
+
+    def cancel(self):
+        """Cancels the synthesis run using this budget, it stops at its next check."""
+        self.cancel_event.set()
+
+    def _exceed(self, limit):
+        if self.exceeded is None:
+            self.exceeded = limit
+        raise BudgetExceeded(limit)
+
+    def check(self):
+        """Raises BudgetExceeded if the run was cancelled or the deadline has passed.
+
+        Returns:
+            Nothing
+        """
+
+        if self.cancel_event.is_set():
+            self._exceed("cancelled")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self._exceed("deadline")
+
+    def add_live_graphs(self, count):
+        """Counts graphs entering (positive count) or leaving (negative count) a work queue.
+
+        Parameters:
+            count (int): Change of the number of live graphs
+
+        Returns:
+            Nothing
+        """
+
+        self.live_graphs += count
+        if (
+            count > 0
+            and self.max_live_graphs is not None
+            and self.live_graphs > self.max_live_graphs
+        ):
+            self._exceed("live_graphs")
+
+    def add_result(self):
+        """Counts a result that was found, unless max_results results were already counted.
+
+        A run that finds exactly max_results results is not exceeded, exceeded is only set when one more result is found.
+
+        Returns:
+            True if the result is counted and may be returned
+            False otherwise
+        """
+
+        if self.max_results is not None and self.results >= self.max_results:
+            if self.exceeded is None:
+                self.exceeded = "results"
+            return False
+        self.results += 1
+        return True
@@ -0,0 +1,216 @@
+# pylint: disable=missing-module-docstring, c0301
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from budget import Budget
+from graph_functions import graph_to_dict
+from main import generate_distinguished_graphs, iter_distinguished_graphs
+
+FORMATS = ("graphml", "dot", "json")
+
+# exit code when the timeout ends the synthesis before it is done
+EXIT_TIMEOUT = 3
+
+
+def parse_arguments(argv=None):
+    """Returns the parsed command line arguments.
+
+    Parameters:
+        argv ([str]): Arguments without the program name, sys.argv[1:] if None
+
+    Returns:
+        arguments (argparse.Namespace): The parsed arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="Synthesizes graphs from an input graph that are distinguished by an HML formula.",
+    )
+    parser.add_argument("formula", help="HML formula, e.g. '(<a>true and [b]false)'")
+    parser.add_argument(
+        "graph",
+        nargs="?",
+        default="default_graph",
+        help="path of a .GraphML file or name of a file in input_files (default: default_graph)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=FORMATS,
+        default=None,
+        help="format of the result graphs (default: json if writing to stdout, graphml otherwise)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="results",
+        help="directory for the result files, '-' writes JSON Lines to stdout (default: results)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="maximum number of satisfying and of non satisfying graphs",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes, results are written when the synthesis is done if greater than 1, not combined with --timeout (default: 1)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="seconds after which the synthesis stops, the exit code is %d if it did not finish"
+        % EXIT_TIMEOUT,
+    )
+    parser.add_argument(
+        "--selective",
+        action="store_true",
+        help="only unfold the edges the formula can look at",
+    )
+    parser.add_argument(
+        "--minimize",
+        action="store_true",
+        help="replace the graph by its quotient by bisimulation before unfolding",
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=("isomorphism", "bisimulation"),
+        default="isomorphism",
+        help="which results count as duplicates (default: isomorphism)",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print the number of results and the run time to stderr",
+    )
+    arguments = parser.parse_args(argv)
+    if arguments.format is None:
+        arguments.format = "json" if arguments.output == "-" else "graphml"
+    if arguments.output == "-" and arguments.format != "json":
+        parser.error("writing to stdout requires --format json")
+    if arguments.limit is not None and arguments.limit < 0:
+        parser.error("--limit must not be negative")
+    if arguments.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return arguments
+
+
+def _results(arguments, budget):
+    # yields pairs of the satisfying flag and a result graph, as soon as they are found if a single process is used
+    if arguments.jobs == 1:
+        yield from iter_distinguished_graphs(
+            arguments.formula,
+            arguments.graph,
+            arguments.limit,
+            budget,
+            arguments.selective,
+            arguments.minimize,
+            arguments.dedup,
+        )
+        return
+
+    satisfying_results, non_satisfying_results = generate_distinguished_graphs(
+        arguments.formula,
+        arguments.graph,
+        jobs=arguments.jobs,
+        budget=budget,
+        selective_unfolding=arguments.selective,
+        minimize_input=arguments.minimize,
+        dedup=arguments.dedup,
+    )
+    for satisfying, results in (
+        (True, satisfying_results),
+        (False, non_satisfying_results),
+    ):
+        yield from ((satisfying, result) for result in results[: arguments.limit])
+
+
+def write_result(graph, satisfying, index, arguments):
+    """Writes one result graph in the requested format.
+
+    Parameters:
+        graph (igraph.Graph): A result graph
+        satisfying (bool): True if the graph satisfies the formula
+        index (int): Number of the result among the results with the same flag
+        arguments (argparse.Namespace): The parsed arguments
+
+    Returns:
+        Nothing
+    """
+
+    if arguments.output == "-":
+        record = {"satisfying": satisfying, "index": index}
+        record.update(graph_to_dict(graph))
+        sys.stdout.write(json.dumps(record) + "\n")
+        sys.stdout.flush()
+        return
+
+    name = "%s_%d.%s" % (
+        "satisfying" if satisfying else "non_satisfying",
+        index,
+        arguments.format,
+    )
+    path = os.path.join(arguments.output, name)
+    if arguments.format == "graphml":
+        graph.write_graphml(path)
+    elif arguments.format == "dot":
+        # DOT has no boolean attributes, the edge flags are only meaningful during synthesis
+        graph = graph.copy()
+        del graph.es["processed"]
+        del graph.es["remove"]
+        graph.write_dot(path)
+    else:
+        with open(path, "w", encoding="utf-8") as result_file:
+            json.dump(graph_to_dict(graph), result_file)
+
+
+def run(argv=None):
+    """Runs the synthesis for the command line arguments and writes every result as soon as it is found.
+
+    Parameters:
+        argv ([str]): Arguments without the program name, sys.argv[1:] if None
+
+    Returns:
+        exit_code (int): 0 if the synthesis finished, EXIT_TIMEOUT if the timeout stopped it
+    """
+
+    arguments = parse_arguments(argv)
+    if arguments.output != "-":
+        os.makedirs(arguments.output, exist_ok=True)
+
+    # the worker pool of --jobs is only used without a budget
+    budget = None if arguments.timeout is None else Budget(timeout=arguments.timeout)
+    if budget is not None and arguments.jobs > 1:
+        print(
+            "warning: --timeout runs the synthesis in a single process, --jobs is ignored",
+            file=sys.stderr,
+        )
+    start = time.perf_counter()
+    counts = {True: 0, False: 0}
+    for satisfying, graph in _results(arguments, budget):
+        write_result(graph, satisfying, counts[satisfying], arguments)
+        counts[satisfying] += 1
+
+    if arguments.stats:
+        print("satisfying: %d" % counts[True], file=sys.stderr)
+        print("non_satisfying: %d" % counts[False], file=sys.stderr)
+        print("seconds: %.3f" % (time.perf_counter() - start), file=sys.stderr)
+        print(
+            "stopped_by: %s" % (budget.exceeded if budget is not None else None),
+            file=sys.stderr,
+        )
+
+    if budget is not None and budget.exceeded == "deadline":
+        return EXIT_TIMEOUT
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,421 @@
+# pylint: disable=missing-module-docstring, c0301
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from igraph import Graph
+
+_label_ids = {}
+_label_names = []
+
+
+def intern_label(label):
+    """Returns the integer id of an edge label, labels get consecutive ids in the order they are first seen.
+
+    Parameters:
+        label (str): An edge label
+
+    Returns:
+        label_id (int): Id of the label in this process
+    """
+
+    label_id = _label_ids.get(label)
+    if label_id is None:
+        label_id = _label_ids[label] = len(_label_names)
+        _label_names.append(label)
+    return label_id
+
+
+def label_name(label_id):
+    """Returns the edge label with the given id."""
+    return _label_names[label_id]
+
+
+def _int_array(values):
+    if isinstance(values, array) and values.typecode == "l":
+        return values
+    return array("l", values)
+
+
+class CompactLTS:
+    """An immutable edge labelled graph stored in flat integer arrays.
+
+    Edge e goes from sources[e] to targets[e] and has the interned label labels[e]. The outgoing edges of the nodes are indexed in compressed sparse row form, built on first use: the edges starting at node v are out_edges[out_offsets[v]:out_offsets[v + 1]], sorted by label id, then by target and then by descending edge id. The edges with one label are a contiguous slice of that range, in the order igraph lists the outgoing edges of a node.
+
+    Label ids are only valid in the process that interned them, pickled graphs carry the label names.
+
+    The sets of nodes reachable from a node are memoized. A graph derived by without_edges, extended or induced keeps the memo of the graph it was derived from and updates a memoized set incrementally when it is asked for, instead of searching the whole reachable part again.
+
+    Parameters:
+        vertex_count (int): Number of nodes
+        sources ([int]): Source node of every edge
+        targets ([int]): Target node of every edge
+        labels ([int]): Interned label id of every edge
+    """
+
+    __slots__ = (
+        "vertex_count",
+        "sources",
+        "targets",
+        "labels",
+        "_out_offsets",
+        "_out_edges",
+        "_out_labels",
+        "_reachable",
+        "_origin",
+        "_subgraph_hashes",
+        "_successor_hashes",
+    )
+
+    def __init__(self, vertex_count, sources=(), targets=(), labels=()):
+        self.vertex_count = vertex_count
+        self.sources = _int_array(sources)
+        self.targets = _int_array(targets)
+        self.labels = _int_array(labels)
+        self._out_offsets = None
+        self._out_edges = None
+        self._out_labels = None
+        self._reachable = {}
+        # (kind, memo of the graph this one was derived from, data of the change) or None
+        self._origin = None
+        self._subgraph_hashes = {}
+        self._successor_hashes = {}
+
+    @classmethod
+    def from_igraph(cls, graph):
+        """Returns the compact form of an igraph graph with a "label" edge attribute.
+
+        Parameters:
+            graph (igraph.Graph): A graph
+
+        Returns:
+            lts (CompactLTS): Graph with the same node and edge ids
+        """
+
+        edges = graph.get_edgelist()
+        labels = graph.es["label"] if edges else []
+        return cls(
+            graph.vcount(),
+            [source for source, _ in edges],
+            [target for _, target in edges],
+            [intern_label(label) for label in labels],
+        )
+
+    def to_igraph(self):
+        """Returns an igraph graph with the same node and edge ids and a "label" edge attribute."""
+        graph = Graph(n=self.vertex_count, edges=self.edge_list(), directed=True)
+        if self.labels:
+            graph.es["label"] = self.label_names()
+        return graph
+
+    def __getstate__(self):
+        return (
+            self.vertex_count,
+            self.sources,
+            self.targets,
+            self.label_names(),
+        )
+
+    def __setstate__(self, state):
+        vertex_count, sources, targets, names = state
+        self.__init__(
+            vertex_count, sources, targets, [intern_label(name) for name in names]
+        )
+
+    def ecount(self):
+        """Returns the number of edges."""
+        return len(self.sources)
+
+    def edge_list(self):
+        """Returns the source and target of every edge."""
+        return list(zip(self.sources, self.targets))
+
+    def label_names(self):
+        """Returns the label of every edge."""
+        return [_label_names[label] for label in self.labels]
+
+    def _build_index(self):
+        order = sorted(
+            range(len(self.sources)),
+            key=lambda edge: (
+                self.sources[edge],
+                self.labels[edge],
+                self.targets[edge],
+                -edge,
+            ),
+        )
+        offsets = array("l", [0]) * (self.vertex_count + 1)
+        for source in self.sources:
+            offsets[source + 1] += 1
+        for vertex in range(self.vertex_count):
+            offsets[vertex + 1] += offsets[vertex]
+        self._out_edges = array("l", order)
+        self._out_labels = array("l", [self.labels[edge] for edge in order])
+        self._out_offsets = offsets
+
+    def out_edges(self, vertex, label=None):
+        """Returns the ids of the outgoing edges of a node.
+
+        Parameters:
+            vertex (int): A node
+            label (int): Only edges with this label id are returned if given
+
+        Returns:
+            edges (array): Ids of the outgoing edges, in the order of the index
+        """
+
+        if self._out_offsets is None:
+            self._build_index()
+        start = self._out_offsets[vertex]
+        end = self._out_offsets[vertex + 1]
+        if label is not None:
+            start, end = (
+                bisect_left(self._out_labels, label, start, end),
+                bisect_right(self._out_labels, label, start, end),
+            )
+        return self._out_edges[start:end]
+
+    def reachable(self, vertex):
+        """Returns the set of nodes reachable from a node, including the node itself.
+
+        Parameters:
+            vertex (int): A node
+
+        Returns:
+            reached (frozenset): The reachable nodes, memoized per graph
+        """
+
+        reached = self._reachable.get(vertex)
+        if reached is None:
+            reached = self._derived_reachable(vertex)
+            if reached is None:
+                reached = self._search({vertex}, [vertex])
+            self._reachable[vertex] = reached
+        return reached
+
+    def _derived_reachable(self, vertex):
+        # updates the memoized set of the graph this one was derived from, None if there is none
+        if self._origin is None:
+            return None
+        kind, memo, change = self._origin
+        if kind == "induced":
+            vertex_ids, original_ids = change
+            reached = memo.get(original_ids[vertex])
+            if reached is None:
+                return None
+            return frozenset(vertex_ids[original] for original in reached)
+
+        reached = memo.get(vertex)
+        if reached is None:
+            return None
+        if kind == "without_edges":
+            # deleting edges that are never used from the node changes nothing, otherwise the node has to be searched again
+            return reached if reached.isdisjoint(change) else None
+
+        # appended edges can only add nodes, the search continues from the new edges leaving the reached nodes
+        stack = [
+            self.targets[edge]
+            for edge in range(change, len(self.sources))
+            if self.sources[edge] in reached and self.targets[edge] not in reached
+        ]
+        if not stack:
+            return reached
+        return self._search(set(reached).union(stack), stack)
+
+    def _search(self, reached, stack):
+        # depth first search from the nodes on the stack, reached contains the nodes already found
+        if self._out_offsets is None:
+            self._build_index()
+        offsets, out_edges, targets = self._out_offsets, self._out_edges, self.targets
+        while stack:
+            current = stack.pop()
+            for index in range(offsets[current], offsets[current + 1]):
+                target = targets[out_edges[index]]
+                if target not in reached:
+                    reached.add(target)
+                    stack.append(target)
+        return frozenset(reached)
+
+    def subgraph_hash(self, vertex):
+        """Returns a hash of the part of the graph reachable from a node.
+
+        The hash is a Merkle hash over the strongly connected components, computed once per graph for all nodes reachable from the node. A node that is not on a cycle hashes the sorted labels and hashes of its successors, which is exact on the tree part of an unfolded graph up to hash collisions. The nodes of a component with a cycle share the hash of its size, the labels of its inner edges and the labels and hashes of the edges leaving it.
+
+        If the reachable parts from two nodes are isomorphic, also without mapping the nodes onto each other, their hashes are the same: only a node that is not on a cycle has no incoming edge in its reachable part, and otherwise the node is in the only component without incoming edges.
+
+        Parameters:
+            vertex (int): A node
+
+        Returns:
+            subgraph_hash (int): Hash of the reachable part, only comparable within one process
+        """
+
+        subgraph_hash = self._subgraph_hashes.get(vertex)
+        if subgraph_hash is None:
+            self._hash_components(vertex)
+            subgraph_hash = self._subgraph_hashes[vertex]
+        return subgraph_hash
+
+    def successors_by_hash(self, vertex, label):
+        """Returns the successors of a node by one label, grouped by subgraph_hash.
+
+        Parameters:
+            vertex (int): A node
+            label (int): A label id
+
+        Returns:
+            successors ({int: [int]}): Targets of the outgoing edges of the node with the label by their subgraph hash, memoized per graph
+        """
+
+        key = (vertex, label)
+        successors = self._successor_hashes.get(key)
+        if successors is None:
+            successors = {}
+            for edge in self.out_edges(vertex, label):
+                target = self.targets[edge]
+                successors.setdefault(self.subgraph_hash(target), []).append(target)
+            self._successor_hashes[key] = successors
+        return successors
+
+    def _hash_components(self, root):
+        # iterative Tarjan from the root, components are completed successors first, so the hashes of their successors are known
+        if self._out_offsets is None:
+            self._build_index()
+        offsets, out_edges = self._out_offsets, self._out_edges
+        targets, labels, hashes = self.targets, self.labels, self._subgraph_hashes
+        index = {root: 0}
+        lowlink = {root: 0}
+        stack = [root]
+        on_stack = {root}
+        work = [(root, offsets[root])]
+        while work:
+            vertex, position = work[-1]
+            if position < offsets[vertex + 1]:
+                work[-1] = (vertex, position + 1)
+                target = targets[out_edges[position]]
+                if target in hashes:
+                    continue
+                if target not in index:
+                    index[target] = lowlink[target] = len(index)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, offsets[target]))
+                elif target in on_stack:
+                    lowlink[vertex] = min(lowlink[vertex], index[target])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[vertex])
+            if lowlink[vertex] != index[vertex]:
+                continue
+
+            component = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                component.append(member)
+                if member == vertex:
+                    break
+            members = set(component)
+            inner_labels = []
+            exits = []
+            for member in component:
+                for position in range(offsets[member], offsets[member + 1]):
+                    edge = out_edges[position]
+                    if targets[edge] in members:
+                        inner_labels.append(labels[edge])
+                    else:
+                        exits.append((labels[edge], hashes[targets[edge]]))
+            if inner_labels:
+                component_hash = hash(
+                    (
+                        1,
+                        len(component),
+                        tuple(sorted(inner_labels)),
+                        tuple(sorted(exits)),
+                    )
+                )
+            else:
+                component_hash = hash((0, tuple(sorted(exits))))
+            for member in component:
+                hashes[member] = component_hash
+
+    def without_edges(self, edges):
+        """Returns a copy without the given edges, the remaining edges keep their order.
+
+        Parameters:
+            edges (set): Ids of the edges to delete
+
+        Returns:
+            lts (CompactLTS): Graph with the same nodes
+        """
+
+        kept = [edge for edge in range(len(self.sources)) if edge not in edges]
+        lts = CompactLTS(
+            self.vertex_count,
+            [self.sources[edge] for edge in kept],
+            [self.targets[edge] for edge in kept],
+            [self.labels[edge] for edge in kept],
+        )
+        lts._origin = (
+            "without_edges",
+            self._reachable,
+            frozenset(self.sources[edge] for edge in edges),
+        )
+        return lts
+
+    def induced(self, vertices):
+        """Returns the subgraph on a set of nodes that contains every successor of its nodes.
+
+        Nodes and edges keep their relative order.
+
+        Parameters:
+            vertices (set): Nodes of the subgraph
+
+        Returns:
+            lts (CompactLTS): The subgraph
+            vertex_ids ({int: int}): New id of every node of the subgraph
+            edge_ids ({int: int}): New id of every edge starting at a node of the subgraph
+        """
+
+        vertex_ids = {}
+        for vertex in range(self.vertex_count):
+            if vertex in vertices:
+                vertex_ids[vertex] = len(vertex_ids)
+        edge_ids = {}
+        for edge, source in enumerate(self.sources):
+            if source in vertex_ids:
+                edge_ids[edge] = len(edge_ids)
+        lts = CompactLTS(
+            len(vertex_ids),
+            [vertex_ids[self.sources[edge]] for edge in edge_ids],
+            [vertex_ids[self.targets[edge]] for edge in edge_ids],
+            [self.labels[edge] for edge in edge_ids],
+        )
+        lts._origin = ("induced", self._reachable, (vertex_ids, list(vertex_ids)))
+        return lts, vertex_ids, edge_ids
+
+    def extended(self, vertex_count, edges, labels):
+        """Returns a copy with nodes and edges appended.
+
+        Parameters:
+            vertex_count (int): Number of new nodes, they get the ids following the existing nodes
+            edges ([(int, int)]): Source and target of every new edge
+            labels ([int]): Label id of every new edge
+
+        Returns:
+            lts (CompactLTS): The extended graph
+        """
+
+        sources = array("l", self.sources)
+        targets = array("l", self.targets)
+        for source, target in edges:
+            sources.append(source)
+            targets.append(target)
+        new_labels = array("l", self.labels)
+        new_labels.extend(labels)
+        lts = CompactLTS(self.vertex_count + vertex_count, sources, targets, new_labels)
+        lts._origin = ("extended", self._reachable, len(self.sources))
+        return lts
@@ -0,0 +1,149 @@
+# pylint: disable=missing-module-docstring, c0301, w0703
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from graph_functions import graph_to_dict
+from main import generate_distinguished_graphs
+
+
+def corpus_files(directory="input_files"):
+    """Returns the paths of the GraphML files in a directory, largest first.
+
+    Parameters:
+        directory (str): A directory
+
+    Returns:
+        paths ([str]): Paths of the files ending in .GraphML, in any case
+    """
+
+    paths = [
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith(".graphml")
+    ]
+    # large models are started first, so they do not end up running alone at the end
+    return sorted(paths, key=lambda path: (-os.path.getsize(path), path))
+
+
+def _corpus_worker(formula_str, path):
+    start = time.perf_counter()
+    record = {"file": path}
+    try:
+        satisfying_results, non_satisfying_results = generate_distinguished_graphs(
+            formula_str, path
+        )
+        record["satisfying"] = [graph_to_dict(graph) for graph in satisfying_results]
+        record["non_satisfying"] = [
+            graph_to_dict(graph) for graph in non_satisfying_results
+        ]
+        record["error"] = None
+    except Exception as error:
+        record["error"] = type(error).__name__ + ": " + str(error)
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def iter_corpus(formula_str, directory="input_files", jobs=None):
+    """Yields the results of generate_distinguished_graphs for every GraphML file in a directory as soon as they are done.
+
+    Every file is a separate task of a process pool, so idle workers take the next file. A file that fails is reported with its error, the other files are not affected. A worker process that dies, e.g. when it is killed, breaks the whole pool: the files that were waiting are run again in a new pool, and the files that were running are run again each in a pool of its own, so only the file that killed its worker is reported as failed.
+
+    Parameters:
+        formula_str (str): A formula in string representation
+        directory (str): Directory with the GraphML files
+        jobs (int): Number of worker processes, the number of processors if None
+
+    Yields:
+        record (dict): Path of the file, satisfying and non satisfying results as returned by graph_to_dict, error message or None and seconds spent in the worker
+    """
+
+    paths = corpus_files(directory)
+    while paths:
+        suspects = []
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            pending = {
+                executor.submit(_corpus_worker, formula_str, path): path
+                for path in paths
+            }
+            paths = []
+            # futures that were running when the pool broke, None while it works
+            running = None
+            while pending:
+                started = {future for future in pending if future.running()}
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        yield future.result()
+                    except BrokenProcessPool:
+                        if running is None:
+                            running = started
+                        (suspects if future in running else paths).append(path)
+                    except Exception as error:
+                        yield _failed_record(path, error)
+        if not suspects:
+            # the worker that died was not seen running, so all files are suspects
+            suspects, paths = paths, []
+        yield from _isolated_corpus(formula_str, suspects)
+
+
+def _isolated_corpus(formula_str, paths):
+    # runs every file in a process pool of its own, a worker that dies only fails its own file
+    executors = [ProcessPoolExecutor(max_workers=1) for _ in paths]
+    try:
+        pending = {
+            executor.submit(_corpus_worker, formula_str, path): path
+            for executor, path in zip(executors, paths)
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception as error:
+                    # the worker process itself failed, e.g. it was killed
+                    yield _failed_record(path, error)
+    finally:
+        for executor in executors:
+            executor.shutdown()
+
+
+def _failed_record(path, error):
+    return {
+        "file": path,
+        "error": type(error).__name__ + ": " + str(error),
+        "seconds": None,
+    }
+
+
+def run_corpus(formula_str, directory="input_files", output="results.jsonl", jobs=None):
+    """Writes the results of generate_distinguished_graphs for every GraphML file in a directory to a JSON Lines file.
+
+    One line is written and flushed per file as soon as the file is done, see iter_corpus.
+
+    Parameters:
+        formula_str (str): A formula in string representation
+        directory (str): Directory with the GraphML files
+        output (str or file): Path of the output file, or a file object opened for writing text
+        jobs (int): Number of worker processes, the number of processors if None
+
+    Returns:
+        failed (int): Number of files that failed
+    """
+
+    if isinstance(output, str):
+        with open(output, "w", encoding="utf-8") as output_file:
+            return run_corpus(formula_str, directory, output_file, jobs)
+
+    failed = 0
+    for record in iter_corpus(formula_str, directory, jobs):
+        if record["error"] is not None:
+            failed += 1
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+    return failed
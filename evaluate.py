@@ -1,5 +1,8 @@
 """This code was re-used from github.com/tobchen/TobyHML with permission from the author"""
 
+import weakref
+
+
 # TODO Maybe use NetworkX instead of own LTS
 def evaluate(start_token, lts):
     return generate_set(start_token, lts)
@@ -65,7 +68,89 @@ def set_from_lts(lts):
     return result
 
 
+def check(start_token, lts, state_name):
+    """Returns whether the state named state_name satisfies the formula.
+
+    The result is the same as state_name in evaluate(start_token, lts), but
+    only the states the formula reaches from state_name are visited. Use a
+    LocalChecker to check several states or formulas on the same LTS.
+    """
+    return LocalChecker(lts).check(start_token, state_name)
+
+
+class LocalChecker:
+    """Checks formulas at single states of an LTS, goal-directed.
+
+    Verdicts are memoized per state and subformula, so the LTS must not
+    change while the checker is used. States are looked up with
+    lts.get_state if the LTS has it, otherwise in an index of lts.states
+    that is built on the first lookup.
+    """
+
+    def __init__(self, lts):
+        self.memo = {}
+        self._lts = lts
+        self._get_state = getattr(lts, "get_state", None)
+        self._states = None
+
+    def find_state(self, state_name):
+        if self._get_state is not None:
+            return self._get_state(state_name)
+        if self._states is None:
+            # the first state with a name is found, like in a scan of lts.states
+            self._states = {}
+            for state in self._lts.states:
+                self._states.setdefault(state.name, state)
+        return self._states.get(state_name)
+
+    def check(self, token, state_name):
+        key = (state_name, token)
+        verdict = self.memo.get(key)
+        if verdict is None:
+            verdict = self._check(token, state_name)
+            self.memo[key] = verdict
+        return verdict
+
+    def _check(self, token, state_name):
+        state = self.find_state(state_name)
+        if state is None:
+            # evaluate only ever returns states of the LTS
+            return False
+
+        if token.ident == Token.ID_TRUE:
+            return True
+
+        if token.ident == Token.ID_AND:
+            return self.check(token.first, state_name) and \
+                self.check(token.second, state_name)
+
+        if token.ident == Token.ID_OR:
+            return self.check(token.first, state_name) or \
+                self.check(token.second, state_name)
+
+        if token.ident in (Token.ID_POSSIBLE, Token.ID_NECESSARY):
+            possible = token.ident == Token.ID_POSSIBLE
+            # transitions are grouped by name, like in generate_set
+            for transition in state.transitions:
+                if transition.name == token.first:
+                    if possible:
+                        return any(self.check(token.second, state2)
+                                   for state2 in transition.to_states)
+                    return all(self.check(token.second, state2)
+                               for state2 in transition.to_states)
+            return not possible
+
+        return False
+
+
 class Token:
+    """An immutable, interned HML formula node.
+
+    Structurally equal formulas are the same object, so equality is identity
+    and shared subformulas form a DAG. Hash, modal depth and size are computed
+    once when a node is created.
+    """
+
     ID_ERROR = -1
     ID_TRUE = 0
     ID_FALSE = 1
@@ -74,16 +159,43 @@ class Token:
     ID_POSSIBLE = 4
     ID_NECESSARY = 5
 
-    def __init__(self, ident):
-        self.ident = ident
-        self.first = None
-        self.second = None
-
-    def change(self, ident):
-        self.ident = ident
-
-    def set_first(self, first):
-        self.first = first
-
-    def set_second(self, second):
-        self.second = second
\ No newline at end of file
+    __slots__ = ('ident', 'first', 'second', 'depth', 'size', '_hash',
+                 '__weakref__')
+
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, ident, first=None, second=None):
+        # children are interned already, so the key compares them by identity
+        key = (ident, first, second)
+        token = cls._interned.get(key)
+        if token is not None:
+            return token
+
+        token = object.__new__(cls)
+        if ident in (cls.ID_AND, cls.ID_OR):
+            depth = max(first.depth, second.depth)
+            size = 1 + first.size + second.size
+        elif ident in (cls.ID_POSSIBLE, cls.ID_NECESSARY):
+            depth = 1 + second.depth
+            size = 1 + second.size
+        else:
+            depth = 0
+            size = 1
+        for name, value in (('ident', ident), ('first', first),
+                            ('second', second), ('depth', depth),
+                            ('size', size), ('_hash', hash(key))):
+            object.__setattr__(token, name, value)
+        cls._interned[key] = token
+        return token
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Token is immutable')
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return self is other
+
+    def __reduce__(self):
+        return Token, (self.ident, self.first, self.second)
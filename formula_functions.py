@@ -1,18 +1,23 @@
-# pylint: disable=missing-module-docstring, w0404, r0912
+# pylint: disable=missing-module-docstring, r0912
 from evaluate import Token
-from parse import Token, parse
 
 
-def formula_to_str(formula):
+def formula_to_str(formula, memo=None):
     """Returns a string representation of a formula.
 
     Parameters:
         formula (Token): A formula
+        memo (dict): Strings of already visited subformulas, shared subformulas are only converted once
 
     Returns:
         formula_str (str): String representation of the input formula
     """
 
+    if memo is None:
+        memo = {}
+    if formula in memo:
+        return memo[formula]
+
     if formula.ident == Token.ID_TRUE:
         formula_string = "true"
     elif formula.ident == Token.ID_FALSE:
@@ -20,72 +25,82 @@ def formula_to_str(formula):
     elif formula.ident == Token.ID_OR:
         formula_string = (
             "("
-            + formula_to_str(formula.first)
+            + formula_to_str(formula.first, memo)
             + " or "
-            + formula_to_str(formula.second)
+            + formula_to_str(formula.second, memo)
             + ")"
         )
     elif formula.ident == Token.ID_AND:
         formula_string = (
             "("
-            + formula_to_str(formula.first)
+            + formula_to_str(formula.first, memo)
             + " and "
-            + formula_to_str(formula.second)
+            + formula_to_str(formula.second, memo)
             + ")"
         )
     elif formula.ident == Token.ID_POSSIBLE:
-        formula_string = "<" + formula.first + ">" + formula_to_str(formula.second)
+        formula_string = (
+            "<" + formula.first + ">" + formula_to_str(formula.second, memo)
+        )
     elif formula.ident == Token.ID_NECESSARY:
-        formula_string = "[" + formula.first + "]" + formula_to_str(formula.second)
+        formula_string = (
+            "[" + formula.first + "]" + formula_to_str(formula.second, memo)
+        )
+    memo[formula] = formula_string
     return formula_string
 
 
-def minimize_formula(formula):
+def minimize_formula(formula, memo=None):
     """
     Removes trivial true/false in combination with and/or or possible/necessary.
 
     Parameters:
         formula (Token): A formula
+        memo (dict): Minimized versions of already visited subformulas
 
     Returns:
         new_formula (Token): Minimized version of input formula
     """
 
+    if memo is None:
+        memo = {}
+    if formula in memo:
+        return memo[formula]
+
     if formula.ident in [Token.ID_TRUE, Token.ID_FALSE]:
         new_formula = formula
     elif formula.ident in [Token.ID_NECESSARY, Token.ID_POSSIBLE]:
-        result = minimize_formula(formula.second)
+        result = minimize_formula(formula.second, memo)
         if result.ident == Token.ID_TRUE and formula.ident == Token.ID_NECESSARY:
             new_formula = Token(Token.ID_TRUE)
         elif result.ident == Token.ID_FALSE and formula.ident == Token.ID_POSSIBLE:
             new_formula = Token(Token.ID_FALSE)
         else:
-            new_formula = Token(formula.ident)
-            new_formula.first = formula.first
-            new_formula.second = result
+            new_formula = Token(formula.ident, formula.first, result)
     elif formula.ident == Token.ID_OR:
-        formula.first = minimize_formula(formula.first)
-        formula.second = minimize_formula(formula.second)
-        if Token.ID_TRUE in [formula.first.ident, formula.second.ident]:
+        first = minimize_formula(formula.first, memo)
+        second = minimize_formula(formula.second, memo)
+        if Token.ID_TRUE in [first.ident, second.ident]:
             new_formula = Token(Token.ID_TRUE)
-        elif formula.first.ident == Token.ID_FALSE:
-            new_formula = formula.second
-        elif formula.second.ident == Token.ID_FALSE:
-            new_formula = formula.first
+        elif first.ident == Token.ID_FALSE:
+            new_formula = second
+        elif second.ident == Token.ID_FALSE:
+            new_formula = first
         else:
-            new_formula = formula
+            new_formula = Token(Token.ID_OR, first, second)
     elif formula.ident == Token.ID_AND:
-        formula.first = minimize_formula(formula.first)
-        formula.second = minimize_formula(formula.second)
-        if formula.first.ident == Token.ID_FALSE:
+        first = minimize_formula(formula.first, memo)
+        second = minimize_formula(formula.second, memo)
+        if first.ident == Token.ID_FALSE:
             new_formula = Token(Token.ID_FALSE)
-        elif formula.first.ident == Token.ID_TRUE:
-            new_formula = formula.second
-        elif formula.second.ident == Token.ID_TRUE:
-            new_formula = formula.first
+        elif first.ident == Token.ID_TRUE:
+            new_formula = second
+        elif second.ident == Token.ID_TRUE:
+            new_formula = first
         else:
-            new_formula = formula
+            new_formula = Token(Token.ID_AND, first, second)
 
+    memo[formula] = new_formula
     return new_formula
 
 
@@ -99,47 +114,104 @@ def depth_formula(formula):
         depth (int): Depth of the input formula
     """
 
-    if formula.ident in (Token.ID_TRUE, Token.ID_FALSE):
-        return 0
-    if formula.ident in (Token.ID_OR, Token.ID_AND):
-        return 0 + max(depth_formula(formula.first), depth_formula(formula.second))
-    return 1 + depth_formula(formula.second)
+    return formula.depth
+
+
+def label_tree(formula, memo=None):
+    """Returns the sequences of labels whose edges a formula can look at, as a tree.
+
+    tree[a][b] exists if the formula can look at the b-labelled edges of a node reached by an a-labelled edge. A formula and its negation have the same label tree.
+
+    Parameters:
+        formula (Token): A formula
+        memo (dict): Label trees of already visited subformulas, they are shared and must not be changed
+
+    Returns:
+        tree (dict): The label tree, every label maps to the tree of the subformulas after it
+    """
+
+    if memo is None:
+        memo = {}
+    if formula in memo:
+        return memo[formula]
+
+    if formula.ident in [Token.ID_POSSIBLE, Token.ID_NECESSARY]:
+        tree = {formula.first: label_tree(formula.second, memo)}
+    elif formula.ident in [Token.ID_AND, Token.ID_OR]:
+        tree = merge_label_trees(
+            label_tree(formula.first, memo), label_tree(formula.second, memo)
+        )
+    else:
+        tree = {}
 
+    memo[formula] = tree
+    return tree
 
-def negate_formula(formula):
+
+def merge_label_trees(first, second):
+    """Returns a label tree containing the label sequences of both input trees.
+
+    Parameters:
+        first (dict): A label tree
+        second (dict): A label tree
+
+    Returns:
+        tree (dict): A new tree, subtrees only occurring in one input tree are shared with it
+    """
+
+    tree = dict(first)
+    for label, subtree in second.items():
+        tree[label] = (
+            merge_label_trees(tree[label], subtree) if label in tree else subtree
+        )
+    return tree
+
+
+def negate_formula(formula, memo=None):
     """Returns a negated version of the input formula.
 
     Parameters:
         formula (Token): A formula
+        memo (dict): Negations of already visited subformulas, shared subformulas are only negated once
 
     Returns:
         negated_formula (Token): Negated version of the input formula
     """
 
+    if memo is None:
+        memo = {}
+    if formula in memo:
+        return memo[formula]
+
     if formula.ident == Token.ID_TRUE:
-        return parse("false")
+        negated_formula = Token(Token.ID_FALSE)
 
-    if formula.ident == Token.ID_FALSE:
-        return parse("true")
+    elif formula.ident == Token.ID_FALSE:
+        negated_formula = Token(Token.ID_TRUE)
 
-    if formula.ident == Token.ID_OR:
-        negated_formula = Token(Token.ID_AND)
-        negated_formula.first = negate_formula(formula.first)
-        negated_formula.second = negate_formula(formula.second)
+    elif formula.ident == Token.ID_OR:
+        negated_formula = Token(
+            Token.ID_AND,
+            negate_formula(formula.first, memo),
+            negate_formula(formula.second, memo),
+        )
 
     elif formula.ident == Token.ID_AND:
-        negated_formula = Token(Token.ID_OR)
-        negated_formula.first = negate_formula(formula.first)
-        negated_formula.second = negate_formula(formula.second)
+        negated_formula = Token(
+            Token.ID_OR,
+            negate_formula(formula.first, memo),
+            negate_formula(formula.second, memo),
+        )
 
     elif formula.ident == Token.ID_NECESSARY:
-        negated_formula = Token(Token.ID_POSSIBLE)
-        negated_formula.first = formula.first
-        negated_formula.second = negate_formula(formula.second)
+        negated_formula = Token(
+            Token.ID_POSSIBLE, formula.first, negate_formula(formula.second, memo)
+        )
 
     elif formula.ident == Token.ID_POSSIBLE:
-        negated_formula = Token(Token.ID_NECESSARY)
-        negated_formula.first = formula.first
-        negated_formula.second = negate_formula(formula.second)
+        negated_formula = Token(
+            Token.ID_NECESSARY, formula.first, negate_formula(formula.second, memo)
+        )
 
+    memo[formula] = negated_formula
     return negated_formula
@@ -1,15 +1,422 @@
 # pylint: disable=missing-module-docstring, w0401, w0614, c0301
 
-from copy import deepcopy
+import hashlib
+import weakref
+from collections import Counter, deque
+from itertools import islice
+
 from igraph import *
 
+from compact_lts import intern_label
+
+
+def canonical_labelling(vertex_count, edges, labels, root=None):
+    """Returns the canonical form of an edge labelled graph and the permutation that leads to it.
+
+    Every edge is subdivided by an extra vertex colored by its label, so the vertex-colored canonical permutation of igraph (BLISS) also respects the labels. The form is the vertex count together with the sorted list of edges relabelled by that permutation.
+
+    Parameters:
+        vertex_count (int): Number of nodes
+        edges ([(int, int)]): Source and target of every edge
+        labels ([str]): Label of every edge
+        root (int): Node that is only mapped to the root of other graphs, no node is distinguished if not given
+
+    Returns:
+        form (tuple): Vertex count, relabelled edge list and, if a root was given, the canonical index of the root
+        permutation ([int]): Canonical index of every node followed by the canonical index of every edge
+    """
+
+    # colors are ranks in the sorted labels of this graph, so they agree between isomorphic graphs
+    label_colors = {label: color for color, label in enumerate(sorted(set(labels)), 2)}
+
+    subdivided_edges = []
+    colors = [0] * vertex_count
+    if root is not None:
+        colors[root] = 1
+    for index, (source, target) in enumerate(edges):
+        subdivided_edges.append((source, vertex_count + index))
+        subdivided_edges.append((vertex_count + index, target))
+        colors.append(label_colors[labels[index]])
+    subdivided_graph = Graph(
+        n=vertex_count + len(edges), edges=subdivided_edges, directed=True
+    )
+    permutation = subdivided_graph.canonical_permutation(color=colors)
+
+    relabelled_edges = tuple(
+        sorted(
+            (permutation[source], label, permutation[target])
+            for (source, target), label in zip(edges, labels)
+        )
+    )
+    if root is None:
+        return (vertex_count, relabelled_edges), permutation
+    return (vertex_count, relabelled_edges, permutation[root]), permutation
+
+
+def canonical_form(graph):
+    """Returns a hashable canonical form of a graph that respects edge labels.
+
+    Two graphs have the same canonical form if and only if they are isomorphic in the sense of isomorphic_in_list, the initial node is not taken into account.
+
+    Parameters:
+        graph (igraph.Graph or GraphHandle): A graph
+
+    Returns:
+        form ((int, tuple)): Vertex count and relabelled edge list of the input graph
+    """
+
+    if not isinstance(graph, Graph):
+        # graph handles cache the canonical form of their graph
+        return graph.canonical_form()
+
+    edges = graph.get_edgelist()
+    labels = graph.es["label"] if edges else []
+    form, _ = canonical_labelling(graph.vcount(), edges, labels)
+    return form
+
+
+class GraphIndex:
+    """A collection of pairwise non-isomorphic graphs with hash based membership tests.
+
+    Graphs are keyed on their canonical form, so adding a graph and testing whether an isomorphic graph is present are dictionary lookups instead of VF2 runs against every stored graph. With key=bisimulation_form the graphs are pairwise not bisimilar instead.
+
+    Parameters:
+        graphs ([igraph.Graph]): Graphs the index is initialized with
+        key (function): Returns the hashable form graphs are compared on, canonical_form if not given
+    """
+
+    def __init__(self, graphs=(), key=None):
+        self._key = canonical_form if key is None else key
+        self._graphs = {}
+        self._keys = {}
+        for graph in graphs:
+            self.add(graph)
+
+    def add(self, graph):
+        """Adds a graph unless an isomorphic graph is already present.
+
+        Parameters:
+            graph (igraph.Graph): A graph
+
+        Returns:
+            True if the graph was added
+            False otherwise
+        """
+
+        key = self._key(graph)
+        if key in self._graphs:
+            return False
+        self._graphs[key] = graph
+        self._keys[id(graph)] = key
+        return True
+
+    def remove(self, graph):
+        """Removes a graph that was added before, using the key it had when it was added.
+
+        Parameters:
+            graph (igraph.Graph): A graph
+
+        Returns:
+            Nothing
+        """
+
+        key = self._keys.pop(id(graph), None)
+        if key is not None:
+            del self._graphs[key]
+
+    def keys(self):
+        """Returns the forms of all graphs in the index."""
+        return self._graphs.keys()
+
+    def __contains__(self, graph):
+        return self._key(graph) in self._graphs
+
+    def __iter__(self):
+        return iter(list(self._graphs.values()))
+
+    def __len__(self):
+        return len(self._graphs)
+
+
+def bisimulation_partition(vertex_count, edges, labels):
+    """Returns the coarsest strong bisimulation of an edge labelled graph as a block index for every node.
+
+    Partition refinement after Paige and Tarjan: every block of the coarse partition that contains more than one block of the fine partition is split by its smaller block B, and the fine blocks are split by the nodes with an edge into B and by the nodes with edges into B but not into the rest of the coarse block. The second split is read off counts of edges per node, label and coarse block, so every node is in O(log n) splitters and the run time is O(m log n).
+
+    Parameters:
+        vertex_count (int): Number of nodes
+        edges ([(int, int)]): Source and target of every edge
+        labels ([str]): Label of every edge
+
+    Returns:
+        blocks ([int]): Block of every node, numbered in the order of their first node
+    """
+
+    in_edges = [[] for _ in range(vertex_count)]
+    counts = {}
+    out_labels = [set() for _ in range(vertex_count)]
+    for (source, target), label in zip(edges, labels):
+        in_edges[target].append((label, source))
+        counts[source, label, 0] = counts.get((source, label, 0), 0) + 1
+        out_labels[source].add(label)
+
+    # the initial fine partition is stable with respect to all nodes: nodes with the same outgoing labels
+    initial_blocks = {}
+    block_of = []
+    for vertex in range(vertex_count):
+        block_of.append(
+            initial_blocks.setdefault(
+                frozenset(out_labels[vertex]), len(initial_blocks)
+            )
+        )
+    blocks = [set() for _ in initial_blocks]
+    for vertex, block in enumerate(block_of):
+        blocks[block].add(vertex)
+    compound_of = [0] * len(blocks)
+    compounds = [set(range(len(blocks)))]
+    worklist = [0] if len(blocks) > 1 else []
+
+    def split(marked):
+        # splits every fine block into its marked and unmarked nodes
+        touched = {}
+        for vertex in marked:
+            touched.setdefault(block_of[vertex], []).append(vertex)
+        for block, members in touched.items():
+            if len(members) == len(blocks[block]):
+                continue
+            new_block = len(blocks)
+            blocks.append(set(members))
+            blocks[block].difference_update(members)
+            for vertex in members:
+                block_of[vertex] = new_block
+            compound = compound_of[block]
+            compound_of.append(compound)
+            compounds[compound].add(new_block)
+            if len(compounds[compound]) == 2:
+                worklist.append(compound)
+
+    while worklist:
+        compound = worklist.pop()
+        if len(compounds[compound]) < 2:
+            continue
+        first, second = list(islice(compounds[compound], 2))
+        splitter = first if len(blocks[first]) <= len(blocks[second]) else second
+        compounds[compound].remove(splitter)
+        if len(compounds[compound]) > 1:
+            worklist.append(compound)
+        new_compound = len(compounds)
+        compounds.append({splitter})
+        compound_of[splitter] = new_compound
+
+        splitter_counts = {}
+        for vertex in list(blocks[splitter]):
+            for label, source in in_edges[vertex]:
+                label_counts = splitter_counts.setdefault(label, {})
+                label_counts[source] = label_counts.get(source, 0) + 1
+        for label, label_counts in splitter_counts.items():
+            split(label_counts)
+            split(
+                [
+                    source
+                    for source, count in label_counts.items()
+                    if count == counts[source, label, compound]
+                ]
+            )
+            for source, count in label_counts.items():
+                remaining = counts.pop((source, label, compound)) - count
+                if remaining:
+                    counts[source, label, compound] = remaining
+                counts[source, label, new_compound] = count
+
+    numbers = {}
+    return [numbers.setdefault(block, len(numbers)) for block in block_of]
+
+
+def _quotient(vertex_count, edges, labels, root, prune=True):
+    # quotient by the coarsest bisimulation and the block of the root, only of the part reachable from the root if prune is set
+    if prune:
+        successors = [[] for _ in range(vertex_count)]
+        for index, (source, target) in enumerate(edges):
+            successors[source].append(index)
+        reached = {root}
+        stack = [root]
+        kept_edges = []
+        while stack:
+            vertex = stack.pop()
+            for index in successors[vertex]:
+                kept_edges.append(index)
+                target = edges[index][1]
+                if target not in reached:
+                    reached.add(target)
+                    stack.append(target)
+        local_ids = {vertex: index for index, vertex in enumerate(sorted(reached))}
+        kept_edges.sort()
+        edges = [
+            (local_ids[edges[index][0]], local_ids[edges[index][1]])
+            for index in kept_edges
+        ]
+        labels = [labels[index] for index in kept_edges]
+        vertex_count = len(local_ids)
+        root = local_ids[root]
+
+    blocks = bisimulation_partition(vertex_count, edges, labels)
+    quotient_edges = sorted(
+        {
+            (blocks[source], label, blocks[target])
+            for (source, target), label in zip(edges, labels)
+        }
+    )
+    return (
+        max(blocks, default=-1) + 1,
+        [(source, target) for source, _, target in quotient_edges],
+        [label for _, label, _ in quotient_edges],
+        blocks[root],
+    )
+
+
+def minimize_graph(graph):
+    """Returns the quotient of a graph by the coarsest strong bisimulation.
+
+    Bisimilar processes satisfy the same HML formulas, so the quotient can replace the input graph of unfold_graph. Node attributes other than the initial node are dropped.
+
+    Parameters:
+        graph (igraph.Graph): A graph with an initial node
+
+    Returns:
+        minimized_graph (igraph.Graph): One node for every block of bisimilar nodes, numbered in the order of their first node, with one edge per label between two blocks
+    """
+
+    edges = graph.get_edgelist()
+    vertex_count, quotient_edges, quotient_labels, initial = _quotient(
+        graph.vcount(),
+        edges,
+        graph.es["label"] if edges else [],
+        int(graph["initial"]),
+        prune=False,
+    )
+    minimized_graph = Graph(n=vertex_count, edges=quotient_edges, directed=True)
+    if quotient_edges:
+        minimized_graph.es["label"] = quotient_labels
+    for attribute in graph.attributes():
+        minimized_graph[attribute] = graph[attribute]
+    minimized_graph["initial"] = initial
+    return minimized_graph
+
+
+def bisimulation_form(graph):
+    """Returns a hashable form of a graph that bisimilar graphs share.
+
+    The form is the rooted canonical form of the quotient of the part reachable from the initial node, two graphs have the same form if and only if their initial nodes are bisimilar. It is coarser than canonical_form, which also tells apart isomorphic graphs with different initial nodes.
+
+    Parameters:
+        graph (igraph.Graph or GraphHandle): A graph with an initial node
+
+    Returns:
+        form (tuple): Canonical form of the rooted quotient, edges are labelled by label id for graph handles
+    """
+
+    if isinstance(graph, Graph):
+        edges = graph.get_edgelist()
+        labels = graph.es["label"] if edges else []
+        vertex_count, initial = graph.vcount(), int(graph["initial"])
+    else:
+        lts = graph.lts
+        edges, labels = lts.edge_list(), list(lts.labels)
+        vertex_count, initial = lts.vertex_count, graph.initial
+    vertex_count, edges, labels, root = _quotient(vertex_count, edges, labels, initial)
+    form, _ = canonical_labelling(vertex_count, edges, labels, root=root)
+    return form
+
+
+def graph_to_dict(graph):
+    """Returns a JSON serializable description of a graph.
+
+    Parameters:
+        graph (igraph.Graph): A graph with an initial node
+
+    Returns:
+        description (dict): Number of nodes, initial node and every edge as a list of source, label and target
+    """
+
+    labels = graph.es["label"] if graph.ecount() else []
+    return {
+        "vertices": graph.vcount(),
+        "initial": int(graph["initial"]),
+        "edges": [
+            [source, label, target]
+            for (source, target), label in zip(graph.get_edgelist(), labels)
+        ],
+    }
+
+
+def graph_content_hash(graph):
+    """Returns a hash of the nodes, edges, labels and initial node of a graph.
+
+    Parameters:
+        graph (igraph.Graph): A graph with an initial node
+
+    Returns:
+        digest (str): Hexadecimal digest, equal for graphs with the same node and edge ids, labels and initial node
+    """
+
+    content = hashlib.sha256()
+    content.update(repr((graph.vcount(), int(graph["initial"]))).encode())
+    content.update(repr(graph.get_edgelist()).encode())
+    content.update(repr(graph.es["label"] if graph.ecount() else []).encode())
+    return content.hexdigest()
+
+
+def graph_invariants(graph):
+    """Returns a signature of a graph that isomorphic graphs share.
+
+    Parameters:
+        graph (igraph.Graph): A graph
+
+    Returns:
+        signature (tuple): Number of nodes and edges, number of edges of every label and sorted pairs of in and out degree of the nodes
+    """
+
+    labels = graph.es["label"] if graph.ecount() else []
+    return (
+        graph.vcount(),
+        graph.ecount(),
+        tuple(sorted(Counter(labels).items())),
+        tuple(sorted(zip(graph.indegree(), graph.outdegree()))),
+    )
+
+
+# invariant signature and edge colors of the graphs passed to isomorphic_in_list, by id of the graph, dropped with the graph
+_vf2_data = {}
+
+
+def _cached_vf2_data(graph):
+    # the stamp holds the edges and labels, so graphs relabelled or retargeted in place are not answered from the cache
+    key = id(graph)
+    labels = graph.es["label"] if graph.ecount() else []
+    stamp = (graph.vcount(), graph.get_edgelist(), labels)
+    entry = _vf2_data.get(key)
+    if entry is not None and entry[0]() is graph and entry[1] == stamp:
+        return entry[2], entry[3]
+
+    signature = graph_invariants(graph)
+    edge_colors = [intern_label(label) for label in labels]
+    _vf2_data[key] = (
+        weakref.ref(graph, lambda _, key=key: _vf2_data.pop(key, None)),
+        stamp,
+        signature,
+        edge_colors,
+    )
+    return signature, edge_colors
+
 
 def isomorphic_in_list(graph, graph_list):
     """Returns if the graph is isomorphic to any of the graphs in the given list.
 
+    The invariant signature and the edge colors of every graph are computed once and cached, VF2 only runs on graphs with the same signature. The cached data of a graph is only used while its edges and labels are unchanged.
+
     Parameters:
         graph (igraph.Graph): A graph
-        graph_list ([igraph.Graph]): A list of graphs
+        graph_list ([igraph.Graph] or GraphIndex): A list of graphs, a GraphIndex is answered by a hash lookup
 
     Returns:
         True if graph is isomorphic to a graph in graph_list
@@ -19,14 +426,14 @@ def isomorphic_in_list(graph, graph_list):
     if not graph_list:
         return False
 
-    edge_color1 = []
-    for edge in graph.es:
-        edge_color1.append(ord(edge["label"]) - 97)
+    if isinstance(graph_list, GraphIndex):
+        return graph in graph_list
 
+    signature1, edge_color1 = _cached_vf2_data(graph)
     for compare_graph in graph_list:
-        edge_color2 = []
-        for edge in compare_graph.es:
-            edge_color2.append(ord(edge["label"]) - 97)
+        signature2, edge_color2 = _cached_vf2_data(compare_graph)
+        if signature1 != signature2:
+            continue
 
         if graph.isomorphic_vf2(
             compare_graph, edge_color1=edge_color1, edge_color2=edge_color2
@@ -39,20 +446,20 @@ def lists_same(graph_list_1, graph_list_2):
     """Returns if for every graph in graph_list_1 there is one isomorphic to it in graph_list_2.
 
     Parameters:
-        graph_list_1 ([igraph.Graph]): A list of graphs
-        graph_list_2 ([igraph.Graph]): A second list of graphs
+        graph_list_1 ([igraph.Graph] or GraphIndex): A list of graphs
+        graph_list_2 ([igraph.Graph] or GraphIndex): A second list of graphs
 
     Returns:
         True if lists are same
         False otherwise
     """
-    for graph in graph_list_1:
-        if not isomorphic_in_list(graph, graph_list_2):
-            return False
-    for graph in graph_list_2:
-        if not isomorphic_in_list(graph, graph_list_1):
-            return False
-    return True
+
+    def canonical_forms(graph_list):
+        if isinstance(graph_list, GraphIndex):
+            return set(graph_list.keys())
+        return {canonical_form(graph) for graph in graph_list}
+
+    return canonical_forms(graph_list_1) == canonical_forms(graph_list_2)
 
 
 def remove_disconnected_vertices(graph):
@@ -65,7 +472,7 @@ def remove_disconnected_vertices(graph):
         new_graph (igraph.Graph): input graph with all nodes (and associated edges) removed that aren't reachable from the initial node
     """
 
-    new_graph = deepcopy(graph)
+    new_graph = graph.copy()
     connected_vertices = new_graph.subcomponent(graph["initial"], mode="out")
     if set(new_graph.vs.indices) - set(connected_vertices):
         for vertex in new_graph.vs:
@@ -113,13 +520,15 @@ def open_graph(filename):
     """Returns a graph read from a file.
 
     Parameters:
-        filename (str): Name of the file where graph description is saved
+        filename (str): Name of the file in input_files where graph description is saved, without extension, or the path of a .GraphML file
 
     Returns:
         graph (igraph.Graph): Graph from file
     """
 
-    graph = Graph.Read_GraphML("input_files/" + filename + ".GraphML")
+    if not filename.lower().endswith(".graphml"):
+        filename = "input_files/" + filename + ".GraphML"
+    graph = Graph.Read_GraphML(filename)
     graph["initial"] = int(graph["initial"])
     return graph
 
@@ -142,11 +551,11 @@ def subgraph_exists_in_graph(subgraph, original_graph, label):
         original_graph.incident(original_graph["initial"], mode="out")
     ]:
         if edge["label"] == label:
-            other_subgraph = deepcopy(original_graph)
+            other_subgraph = original_graph.copy()
             other_subgraph["initial"] = edge.target
             other_subgraph = remove_disconnected_vertices(other_subgraph)
             other_subgraphs.append(other_subgraph)
-    return isomorphic_in_list(subgraph, other_subgraphs)
+    return subgraph in GraphIndex(other_subgraphs)
 
 
 def add_subgraph_to_graph(subgraph, main_graph, label):
@@ -161,7 +570,7 @@ def add_subgraph_to_graph(subgraph, main_graph, label):
         combined_graph (igraph.Graph): Combination of the two given graphs
     """
 
-    combined_graph = deepcopy(main_graph)
+    combined_graph = main_graph.copy()
     combined_graph.add_vertices(subgraph.vcount())
     for subgraph_edge in subgraph.es():
         new_edge = combined_graph.add_edge(
@@ -182,6 +591,8 @@ def add_subgraph_to_graph(subgraph, main_graph, label):
 def unfold_graph(graph, depth=1):
     """Returns a graph that is unfolded up to depth into a partial tree representation and then the original graph.
 
+    The tree is built breadth first with plain lists and the graph is created in one call. The nodes of the input graph that are reachable from the leaves of the tree come first and keep their order, followed by the root of the tree and the tree nodes in breadth first order. The edges are the edges of the input graph between kept nodes, the tree edges and the edges from the leaves into the input graph, in this order.
+
     Parameters:
         graph (igraph.Graph): A graph
         depth (int): Depth the graph should be unfolded to
@@ -190,42 +601,127 @@ def unfold_graph(graph, depth=1):
         unfolded_graph (igraph.Graph): Up to depth unfolded graph combined with input graph as leaves
     """
 
-    unfolded_graph = deepcopy(graph)
-    representatives = {}
-    depths = {}
-    for vertex in unfolded_graph.vs:
-        representatives[vertex.index] = vertex.index
-        depths[vertex.index] = 0
-    current_state = unfolded_graph.add_vertex().index
-    representatives[current_state] = int(unfolded_graph["initial"])
-    depths[current_state] = 1
-    queue = [current_state]
-    unfolded_graph["initial"] = current_state
-
-    # tree needs to be of |depth| heigth
-    while queue and depth > depths[current_state]:
-        # iterates through outgoing edges of current state
-        for edge in graph.es[
-            graph.incident(representatives[current_state], mode="out")
-        ]:
-            new_vertex = unfolded_graph.add_vertex()
-            new_edge = unfolded_graph.add_edge(current_state, new_vertex)
-            new_edge["label"] = edge["label"]
-            representatives[new_vertex.index] = edge.target
-            queue.append(new_vertex.index)
-            depths[new_vertex.index] = depths[current_state] + 1
-        queue.remove(current_state)
-        if queue:
-            current_state = queue[0]
-
-    # if queue is not empty we connect the vertices in the queue with the original vertices
-    if queue:
-        for vertex in queue:
-            for edge in graph.es[graph.incident(representatives[vertex], mode="out")]:
-                new_edge = unfolded_graph.add_edge(vertex, edge.target)
-                new_edge["label"] = edge["label"]
-
-    unfolded_graph = remove_disconnected_vertices(unfolded_graph)
+    # the root has depth 1, nodes above the last level get a tree node for every outgoing edge
+    return _unfold(
+        graph, 1, lambda node_depth, _: node_depth + 1 if node_depth < depth else None
+    )
+
+
+def unfold_graph_selectively(graph, label_tree):
+    """Returns a graph where only the edges a formula can look at are unfolded into a tree.
+
+    An edge of a tree node is unfolded if the formula looks at edges of its target, which is the case if its label leads to a non empty subtree of the label tree. All other edges of tree nodes lead into the input graph, which is shared by all tree nodes. Synthesis only changes the edges a formula looks at and the nodes reached by them, so it gives results satisfying the same formulas as on unfold_graph, on a smaller graph. Node and edge order are as in unfold_graph.
+
+    Parameters:
+        graph (igraph.Graph): A graph
+        label_tree (dict): Labels the formula looks at, as returned by formula_functions.label_tree
+
+    Returns:
+        unfolded_graph (igraph.Graph): Partially unfolded graph combined with input graph
+    """
+
+    return _unfold(graph, label_tree, lambda tree, label: tree.get(label) or None)
+
+
+def _unfold(graph, root_key, step):
+    # step(key, label) returns the key of the tree node for an edge of a tree node with the given key, None if the edge leads into the input graph
+    out_edges = graph.get_inclist(mode="out")
+    original_targets = [target for _, target in graph.get_edgelist()]
+    original_labels = graph.es["label"] if graph.ecount() else []
+
+    # tree nodes are numbered from 0 in breadth first order, the root is 0
+    representatives = [int(graph["initial"])]
+    tree_edges = []
+    tree_labels = []
+    leaf_edges = []
+    queue = deque([(0, root_key)])
+    while queue:
+        current_state, key = queue.popleft()
+        for edge in out_edges[representatives[current_state]]:
+            new_key = step(key, original_labels[edge])
+            if new_key is None:
+                leaf_edges.append((current_state, edge))
+                continue
+            new_state = len(representatives)
+            representatives.append(original_targets[edge])
+            tree_edges.append((current_state, new_state))
+            tree_labels.append(original_labels[edge])
+            queue.append((new_state, new_key))
+
+    return build_unfolded_graph(
+        graph, representatives, tree_edges, tree_labels, leaf_edges
+    )
+
+
+def build_unfolded_graph(graph, representatives, tree_edges, tree_labels, leaf_edges):
+    """Returns the graph of a tree whose leaf edges lead into the part of the input graph they reach.
+
+    The nodes of the input graph that are reachable from the leaf edges come first and keep their order, followed by the tree nodes. The edges are the edges of the input graph between kept nodes, the tree edges and the leaf edges, in this order. Attributes of the input graph are copied, new nodes and edges get None.
+
+    Parameters:
+        graph (igraph.Graph): The input graph
+        representatives ([int]): Node of the input graph that every tree node copies, the root comes first
+        tree_edges ([(int, int)]): Source and target tree node of every tree edge
+        tree_labels ([str]): Label of every tree edge
+        leaf_edges ([(int, int)]): Tree node and edge of the input graph for every edge from the tree into the input graph
+
+    Returns:
+        unfolded_graph (igraph.Graph): The unfolded graph with the root of the tree as initial node
+    """
+
+    out_edges = graph.get_inclist(mode="out")
+    original_edges = graph.get_edgelist()
+    original_targets = [target for _, target in original_edges]
+    original_labels = graph.es["label"] if graph.ecount() else []
+
+    # only the part of the input graph that is reachable from the tree is kept
+    reached = set()
+    stack = [original_targets[edge] for _, edge in leaf_edges]
+    while stack:
+        vertex = stack.pop()
+        if vertex not in reached:
+            reached.add(vertex)
+            stack.extend(original_targets[edge] for edge in out_edges[vertex])
+    kept_vertices = sorted(reached)
+    vertex_ids = {vertex: index for index, vertex in enumerate(kept_vertices)}
+    kept_edges = [
+        edge for edge, (source, _) in enumerate(original_edges) if source in vertex_ids
+    ]
+    tree_offset = len(kept_vertices)
+
+    edges = [
+        (vertex_ids[original_edges[edge][0]], vertex_ids[original_targets[edge]])
+        for edge in kept_edges
+    ]
+    edges += [
+        (source + tree_offset, target + tree_offset) for source, target in tree_edges
+    ]
+    edges += [
+        (leaf + tree_offset, vertex_ids[original_targets[edge]])
+        for leaf, edge in leaf_edges
+    ]
+    unfolded_graph = Graph(
+        n=tree_offset + len(representatives), edges=edges, directed=True
+    )
+    for attribute in graph.attributes():
+        unfolded_graph[attribute] = graph[attribute]
+    unfolded_graph["initial"] = tree_offset
+    new_vertex_count = len(representatives)
+    for attribute in graph.vs.attributes():
+        values = graph.vs[attribute]
+        unfolded_graph.vs[attribute] = [values[vertex] for vertex in kept_vertices] + [
+            None
+        ] * new_vertex_count
+    new_edge_count = len(tree_edges) + len(leaf_edges)
+    for attribute in graph.es.attributes():
+        values = graph.es[attribute]
+        unfolded_graph.es[attribute] = [values[edge] for edge in kept_edges] + [
+            None
+        ] * new_edge_count
+    if unfolded_graph.ecount():
+        unfolded_graph.es["label"] = [original_labels[edge] for edge in kept_edges] + (
+            tree_labels + [original_labels[edge] for _, edge in leaf_edges]
+        )
 
     # color unfolded graph
     color_graph(unfolded_graph)
@@ -0,0 +1,333 @@
+# pylint: disable=missing-module-docstring, c0301
+
+from compact_lts import CompactLTS, intern_label, label_name
+from graph_functions import canonical_labelling
+
+
+class GraphHandle:
+    """A reference to a graph used by the synthesis engine.
+
+    The graph is a CompactLTS, which is never changed, so handles branched from each other share it and a structural change only replaces the graph of the changed handle. The initial node and the processed and remove flags of the edges are stored in the handle, so moving the initial node or flagging edges never copies the graph. igraph graphs are only converted when a handle is created and in to_graph.
+
+    Parameters:
+        graph (igraph.Graph or CompactLTS): A graph, an igraph graph is converted and never changed through the handle
+        initial (int): Initial node of the handle, graph["initial"] if not given, required for a CompactLTS
+    """
+
+    __slots__ = (
+        "_lts",
+        "_canonical_form",
+        "initial",
+        "processed",
+        "remove",
+    )
+
+    def __init__(self, graph, initial=None):
+        self._canonical_form = None
+        self.processed = set()
+        self.remove = set()
+        if isinstance(graph, CompactLTS):
+            self._lts = graph
+            self.initial = initial
+            return
+
+        self._lts = CompactLTS.from_igraph(graph)
+        self.initial = int(graph["initial"]) if initial is None else initial
+        if graph.ecount() and "processed" in graph.es.attributes():
+            self.processed = {edge.index for edge in graph.es if edge["processed"]}
+        if graph.ecount() and "remove" in graph.es.attributes():
+            self.remove = {edge.index for edge in graph.es if edge["remove"]}
+
+    @classmethod
+    def _owned(cls, lts, initial, processed, remove):
+        handle = cls.__new__(cls)
+        handle._lts = lts
+        handle._canonical_form = None
+        handle.initial = initial
+        handle.processed = processed
+        handle.remove = remove
+        return handle
+
+    def __getstate__(self):
+        # the canonical form is built from label ids, which are only valid in the process that interned them
+        return self._lts, self.initial, self.processed, self.remove
+
+    def __setstate__(self, state):
+        self._lts, self.initial, self.processed, self.remove = state
+        self._canonical_form = None
+
+    @property
+    def lts(self):
+        """The underlying CompactLTS."""
+        return self._lts
+
+    def vcount(self):
+        """Returns the number of nodes."""
+        return self._lts.vertex_count
+
+    def ecount(self):
+        """Returns the number of edges."""
+        return self._lts.ecount()
+
+    def __bool__(self):
+        return self._lts.vertex_count > 0
+
+    def branch(self, initial=None):
+        """Returns a new handle sharing the graph of this handle.
+
+        Parameters:
+            initial (int): Initial node of the new handle, the initial node of this handle if not given
+
+        Returns:
+            handle (GraphHandle): Handle with copied flags and the same graph
+        """
+
+        handle = GraphHandle.__new__(GraphHandle)
+        handle._lts = self._lts
+        handle._canonical_form = self._canonical_form
+        handle.initial = self.initial if initial is None else initial
+        handle.processed = set(self.processed)
+        handle.remove = set(self.remove)
+        return handle
+
+    def out_edges(self, vertex=None, label=None):
+        """Returns the ids of the outgoing edges of a node.
+
+        Parameters:
+            vertex (int): A node, the initial node if not given
+            label (str): Only edges with this label are returned if given
+
+        Returns:
+            edges ([int]): Ids of the outgoing edges
+        """
+
+        return self._lts.out_edges(
+            self.initial if vertex is None else vertex,
+            None if label is None else intern_label(label),
+        )
+
+    def label(self, edge):
+        """Returns the label of an edge."""
+        return label_name(self._lts.labels[edge])
+
+    def target(self, edge):
+        """Returns the target node of an edge."""
+        return self._lts.targets[edge]
+
+    def reset_flags(self):
+        """Sets the processed and remove flags of all edges to False."""
+        self.processed = set()
+        self.remove = set()
+
+    def delete_edges(self, edges):
+        """Deletes edges from the graph of this handle, other handles sharing the graph keep it.
+
+        Parameters:
+            edges ([int]): Ids of the edges to delete
+
+        Returns:
+            Nothing
+        """
+
+        edges = set(edges)
+        if not edges:
+            return
+        new_ids = {}
+        for edge in range(self._lts.ecount()):
+            if edge not in edges:
+                new_ids[edge] = len(new_ids)
+        self._lts = self._lts.without_edges(edges)
+        self._canonical_form = None
+        self.processed = {new_ids[edge] for edge in self.processed if edge in new_ids}
+        self.remove = {new_ids[edge] for edge in self.remove if edge in new_ids}
+
+    def pruned(self):
+        """Returns a handle where all nodes are reachable from the initial node.
+
+        Returns:
+            handle (GraphHandle): A branch of this handle if every node is reachable, otherwise a handle on the reachable part of the graph
+        """
+
+        connected_vertices = self._lts.reachable(self.initial)
+        if len(connected_vertices) == self._lts.vertex_count:
+            return self.branch()
+
+        # edges keep their relative order, only edges starting at a reachable node survive
+        lts, new_vertex_ids, new_edge_ids = self._lts.induced(connected_vertices)
+        return GraphHandle._owned(
+            lts,
+            new_vertex_ids[self.initial],
+            {new_edge_ids[edge] for edge in self.processed if edge in new_edge_ids},
+            {new_edge_ids[edge] for edge in self.remove if edge in new_edge_ids},
+        )
+
+    def successor_exists(self, subgraph, label):
+        """Returns True if the subgraph is already reachable by one step with the label from the initial node.
+
+        Successors are only compared with the subgraph if their subgraph_hash matches, and a match is confirmed on the canonical forms.
+
+        Parameters:
+            subgraph (GraphHandle): A graph where every node is reachable from the initial node
+            label (str): Label of the edge possibly connecting the initial node and the subgraph
+
+        Returns:
+            True if the target of an outgoing edge of the initial node with the input label roots a graph isomorphic to subgraph
+            False otherwise
+        """
+
+        candidates = self._lts.successors_by_hash(
+            self.initial, intern_label(label)
+        ).get(subgraph.lts.subgraph_hash(subgraph.initial))
+        if not candidates:
+            return False
+        form = subgraph.canonical_form()
+        return any(
+            self.branch(target).pruned().canonical_form() == form
+            for target in candidates
+        )
+
+    def extend(self, vertex_count, edges, labels, processed=(), remove=()):
+        """Returns a handle on a copy of the graph with nodes and edges appended.
+
+        Parameters:
+            vertex_count (int): Number of new nodes, they get the ids following the existing nodes
+            edges ([(int, int)]): Source and target of every new edge
+            labels ([int]): Interned label id of every new edge
+            processed ([int]): Positions of new edges that are flagged as processed
+            remove ([int]): Positions of new edges that are flagged for removal
+
+        Returns:
+            handle (GraphHandle): Handle on the extended graph
+        """
+
+        edge_count = self._lts.ecount()
+        return GraphHandle._owned(
+            self._lts.extended(vertex_count, edges, labels),
+            self.initial,
+            self.processed | {edge + edge_count for edge in processed},
+            self.remove | {edge + edge_count for edge in remove},
+        )
+
+    def attach(self, subgraph, label):
+        """Returns a handle on the subgraph attached to this graph by an edge from the initial node to the initial node of the subgraph.
+
+        Parameters:
+            subgraph (GraphHandle): A graph
+            label (str): Label of the connecting edge
+
+        Returns:
+            handle (GraphHandle): Combination of the two graphs
+        """
+
+        vertex_count = self._lts.vertex_count
+        sub_lts = subgraph.lts
+
+        return self.extend(
+            sub_lts.vertex_count,
+            [
+                (source + vertex_count, target + vertex_count)
+                for source, target in zip(sub_lts.sources, sub_lts.targets)
+            ]
+            + [(self.initial, subgraph.initial + vertex_count)],
+            list(sub_lts.labels) + [intern_label(label)],
+            processed=list(subgraph.processed) + [sub_lts.ecount()],
+        )
+
+    def original_edge_ids(self, ancestor):
+        """Returns the ids that the edges of this graph have in a graph it was derived from.
+
+        Synthesis derives graphs only by deleting edges, which keeps the order of the remaining edges, and by appending nodes and edges, where every appended edge touches an appended node. The edges kept from the ancestor therefore come first and are matched against the ancestor in order.
+
+        Parameters:
+            ancestor (GraphHandle): Graph this graph was derived from
+
+        Returns:
+            original_ids ([int]): Id in the ancestor of every kept edge, None if this graph is not derived from the ancestor
+        """
+
+        vertex_count = ancestor.vcount()
+        if self._lts.vertex_count < vertex_count:
+            return None
+        lts = self._lts
+        ancestor_lts = ancestor.lts
+        ancestor_edge_count = ancestor_lts.ecount()
+
+        original_ids = []
+        edge = 0
+        for kept in range(lts.ecount()):
+            source, target = lts.sources[kept], lts.targets[kept]
+            if source >= vertex_count or target >= vertex_count:
+                break
+            while edge < ancestor_edge_count and (
+                ancestor_lts.sources[edge] != source
+                or ancestor_lts.targets[edge] != target
+                or ancestor_lts.labels[edge] != lts.labels[kept]
+            ):
+                edge += 1
+            if edge == ancestor_edge_count:
+                return None
+            original_ids.append(edge)
+            edge += 1
+        return original_ids
+
+    def reachable_labelling(self):
+        """Returns the rooted canonical labelling of the part of the graph reachable from the initial node.
+
+        Returns:
+            form (tuple): Canonical form of the reachable part with the initial node as root, edges are labelled by label id
+            vertex_ids ({int: int}): Canonical index of every reachable node
+            edge_ids ({int: int}): Canonical index of every edge starting at a reachable node
+        """
+
+        lts = self._lts
+        reachable = sorted(lts.reachable(self.initial))
+        local_ids = {vertex: index for index, vertex in enumerate(reachable)}
+        reachable_edges = [
+            edge for edge, source in enumerate(lts.sources) if source in local_ids
+        ]
+
+        form, permutation = canonical_labelling(
+            len(reachable),
+            [
+                (local_ids[lts.sources[edge]], local_ids[lts.targets[edge]])
+                for edge in reachable_edges
+            ],
+            [lts.labels[edge] for edge in reachable_edges],
+            root=local_ids[self.initial],
+        )
+        vertex_ids = {vertex: permutation[local_ids[vertex]] for vertex in reachable}
+        edge_ids = {
+            edge: permutation[len(reachable) + index]
+            for index, edge in enumerate(reachable_edges)
+        }
+        return form, vertex_ids, edge_ids
+
+    def rooted_form(self):
+        """Returns the rooted canonical form of the part of the graph reachable from the initial node.
+
+        Two handles have the same rooted form if and only if the graphs reachable from their initial nodes are isomorphic by a mapping of the initial nodes onto each other.
+        """
+        return self.reachable_labelling()[0]
+
+    def canonical_form(self):
+        """Returns the canonical form of the graph with edges labelled by label id, computed once per graph version."""
+        if self._canonical_form is None:
+            self._canonical_form, _ = canonical_labelling(
+                self._lts.vertex_count, self._lts.edge_list(), self._lts.labels
+            )
+        return self._canonical_form
+
+    def to_graph(self):
+        """Returns a new igraph graph with the initial node and edge flags of this handle.
+
+        Returns:
+            graph (igraph.Graph): A copy of the graph
+        """
+
+        graph = self._lts.to_igraph()
+        graph["initial"] = self.initial
+        graph.es["processed"] = [
+            edge in self.processed for edge in range(graph.ecount())
+        ]
+        graph.es["remove"] = [edge in self.remove for edge in range(graph.ecount())]
+        return graph
@@ -108,4 +108,150 @@ class LTS:
                     self.to_states.append(to_state)
 
             def __str__(self):
-                return self.name + " -> " + str(self.to_states)
\ No newline at end of file
+                return self.name + " -> " + str(self.to_states)
+
+
+class IndexedLTS:
+
+    """A labeled transition system with states and transitions indexed by
+    name.
+
+    It has the interface of LTS, but states and transitions are kept in
+    dicts and the target states of a transition in a set, so adding and
+    removing a transition takes constant time. Every state also keeps the
+    pairs of state and transition name that lead to it, so removing a state
+    only touches its own transitions. states and State.transitions are
+    views in insertion order instead of lists.
+    """
+
+    def __init__(self):
+        self._states = {}
+
+    @classmethod
+    def from_edge_arrays(cls, sources, labels, targets, state_count=0):
+        """Builds an LTS with one transition per edge. States are named by
+        str of their id, the states 0 to state_count - 1 are added first,
+        so they are states even if no edge touches them."""
+        lts = cls()
+        for state_id in range(state_count):
+            lts.add_state(str(state_id))
+        for state_from, transition, state_to in zip(sources, labels, targets):
+            lts.add_transition(str(state_from), transition, str(state_to))
+        return lts
+
+    @classmethod
+    def from_igraph(cls, graph):
+        """Builds an LTS with one state per node and one transition per edge
+        of an igraph graph with a label edge attribute."""
+        edges = graph.get_edgelist()
+        labels = graph.es['label'] if edges else []
+        return cls.from_edge_arrays([source for source, _ in edges], labels,
+                                    [target for _, target in edges],
+                                    graph.vcount())
+
+    @property
+    def states(self):
+        return self._states.values()
+
+    def get_state(self, state_name):
+        return self._states.get(state_name)
+
+    def add_state(self, state_name):
+        state = self._states.get(state_name)
+        if state is None:
+            state = self.State(state_name)
+            self._states[state_name] = state
+        return state
+
+    def add_transition(self, state_from, transition, state_to):
+        self.add_state(state_from).add_transition(transition, state_to)
+        self.add_state(state_to).predecessors.add((state_from, transition))
+
+    def remove_state(self, state_name):
+        removed_state = self._states.pop(state_name, None)
+        if removed_state is None:
+            return
+        # Remove the transitions to the state and the back references of
+        # the transitions from it
+        for state_from, transition in removed_state.predecessors:
+            if state_from != state_name:
+                self._states[state_from].remove_transition_to(transition,
+                                                              state_name)
+        for transition in removed_state.transitions:
+            for state_to in transition.to_states:
+                if state_to != state_name:
+                    self._states[state_to].predecessors.discard(
+                        (state_name, transition.name))
+
+    def remove_transition_to(self, state_from, transition, state_to):
+        state = self._states.get(state_from)
+        target_state = self._states.get(state_to)
+        if state is not None and target_state is not None:
+            state.remove_transition_to(transition, state_to)
+            target_state.predecessors.discard((state_from, transition))
+
+    def remove_transition_from(self, state_from, transition):
+        state = self._states.get(state_from)
+        if state is None:
+            return
+        removed_transition = state.remove_transition_from(transition)
+        if removed_transition is not None:
+            for state_to in removed_transition.to_states:
+                self._states[state_to].predecessors.discard((state_from,
+                                                             transition))
+
+    def reset(self):
+        self._states.clear()
+
+    def __str__(self):
+        return '\n'.join(str(state) for state in self.states)
+
+    class State:
+        def __init__(self, name):
+            self.name = name
+            self.predecessors = set()
+            self._transitions = {}
+
+        @property
+        def transitions(self):
+            return self._transitions.values()
+
+        def get_transition(self, name):
+            return self._transitions.get(name)
+
+        def add_transition(self, name, to_state):
+            transition = self._transitions.get(name)
+            if transition is None:
+                self._transitions[name] = self.Transition(name, to_state)
+            else:
+                transition.add_to_state(to_state)
+
+        def remove_transition_to(self, name, to_state):
+            transition = self._transitions.get(name)
+            if transition is not None:
+                transition.to_states.discard(to_state)
+                # Remove the transition once it is empty
+                if not transition.to_states:
+                    del self._transitions[name]
+
+        def remove_transition_from(self, name):
+            return self._transitions.pop(name, None)
+
+        def __str__(self):
+            result = self.name
+            for transition in self.transitions:
+                result += ('\n\t' + str(transition))
+            return result
+
+        class Transition:
+            def __init__(self, name, to_state=None):
+                self.name = name
+                self.to_states = set()
+                if to_state is not None:
+                    self.to_states.add(to_state)
+
+            def add_to_state(self, to_state):
+                self.to_states.add(to_state)
+
+            def __str__(self):
+                return self.name + " -> " + str(sorted(self.to_states))
@@ -1,191 +1,494 @@
 # pylint: disable=missing-module-docstring, w0401, w0614, r0912, r1702, c0301, r0914, r1710, r0911, r0915
 
-from copy import deepcopy
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 
 from igraph import *
 
+from budget import Budget, BudgetExceeded
 from evaluate import Token
 from formula_functions import (
     depth_formula,
     formula_to_str,
+    label_tree,
+    merge_label_trees,
     minimize_formula,
     negate_formula,
 )
 from graph_functions import *
+from graph_handle import GraphHandle
 from parse import parse
+from synthesis_cache import SynthesisCache
+from unfolding_cache import UnfoldingCache
 
+# disjunctions and modal steps with a synthesis_cost below this are not split between worker processes
+FANOUT_THRESHOLD = 256
 
-def synthesis(graph_list, formula):
+synthesis_cache = SynthesisCache()
+
+# unfoldings of input graphs, a deeper unfolding of a graph extends the cached one
+unfolding_cache = UnfoldingCache()
+
+# budget of synthesis calls without limits
+_no_budget = Budget()
+
+
+def synthesis(graph_list, formula, executor=None, fanout_threshold=FANOUT_THRESHOLD):
     """Returns a list of graphs that are altered version of the input graphs that satisfy the input formula.
 
+    Results for a single graph are memoized in synthesis_cache, keyed on the part of the graph reachable from its initial node and the formula.
+
     Parameters:
-        graph_list ([igraph.Graph]): A list of graphs
+        graph_list ([GraphHandle]): A list of copy-on-write graph handles
         formula (Token): A formula
+        executor (concurrent.futures.Executor): Executor the steps of possible and necessary formulas are run in, all work is done in this process if None
+        fanout_threshold (int): Minimum synthesis_cost of a step that is run in the executor
+
+    Returns:
+        return_list ([GraphHandle]): A list of graphs satisfying the input formula
+    """
+
+    if len(graph_list) != 1 or formula.ident in (Token.ID_TRUE, Token.ID_FALSE):
+        return list(_synthesis(graph_list, formula, executor, fanout_threshold))
+
+    results, probe = synthesis_cache.lookup(graph_list[0], formula)
+    if results is None:
+        results = list(_synthesis(graph_list, formula, executor, fanout_threshold))
+        synthesis_cache.store(probe, results)
+    return results
+
+
+def iter_synthesis(graph_list, formula, budget=None):
+    """Yields altered versions of the input graphs that satisfy the input formula as soon as they are found.
+
+    Disjunctions, conjunctions and possible formulas pass on every result of their subformulas right away and necessary formulas yield every graph as soon as all of its steps are done, so closing the generator stops the remaining work. Results are taken from synthesis_cache if it has an entry, but incomplete runs are not stored.
+
+    Parameters:
+        graph_list ([GraphHandle]): A list of copy-on-write graph handles
+        formula (Token): A formula
+        budget (Budget): Limits checked in every loop, BudgetExceeded is raised when one is exceeded
+
+    Yields:
+        result (GraphHandle): A graph satisfying the input formula
+    """
+
+    if budget is not None:
+        budget.check()
+    if len(graph_list) == 1 and formula.ident not in (Token.ID_TRUE, Token.ID_FALSE):
+        results, _ = synthesis_cache.lookup(graph_list[0], formula)
+        if results is not None:
+            yield from results
+            return
+    yield from _synthesis(
+        graph_list, formula, None, FANOUT_THRESHOLD, lazy=True, budget=budget
+    )
+
+
+def _submit_steps(current_graph, formula, executor, fanout_threshold, window=None):
+    """Submits synthesis of the subformula for the steps of a possible or necessary formula to the executor.
+
+    The steps get the flags the loop over the outgoing edges would give them, except for remove flags set by earlier steps of a necessary formula, which _step_results adds afterwards. With a window only that many steps run at once, and _step_results submits the next one whenever it takes a step.
+
+    Parameters:
+        current_graph (GraphHandle): Graph whose initial node is processed
+        formula (Token): A possible or necessary formula
+        executor (concurrent.futures.Executor): Executor running the steps, no step is submitted if None
+        fanout_threshold (int): Minimum synthesis_cost of a step that is submitted
+        window (int): Maximum number of submitted steps that are not taken yet, no maximum if None
+
+    Returns:
+        pending ({int: (GraphHandle, _Probe, Future)}): Steps by edge id in the order of the edges, the probe and future are None for steps that are not submitted yet
+    """
+
+    pending = {}
+    if executor is None or formula.second.ident in (Token.ID_TRUE, Token.ID_FALSE):
+        return pending
+
+    processed = set(current_graph.processed)
+    for edge in current_graph.out_edges(label=formula.first):
+        if edge not in processed:
+            processed.add(edge)
+            changed_graph = current_graph.branch(current_graph.target(edge))
+            changed_graph.processed = set(processed)
+            if synthesis_cost(changed_graph, formula.second) < fanout_threshold:
+                continue
+            pending[edge] = (changed_graph, None, None)
+    _fill_steps(pending, formula.second, executor, window)
+    return pending
+
+
+def _fill_steps(pending, formula, executor, window):
+    # submits steps in the order of the edges until window submitted steps are not taken, steps found in synthesis_cache do not count
+    running = sum(isinstance(step[2], Future) for step in pending.values())
+    for edge, (changed_graph, probe, results) in pending.items():
+        if window is not None and running >= window:
+            return
+        if probe is not None:
+            continue
+        results, probe = synthesis_cache.lookup(changed_graph, formula)
+        if results is None:
+            results = executor.submit(_synthesis_worker, changed_graph, formula)
+            running += 1
+        pending[edge] = (changed_graph, probe, results)
+
+
+def _worker_count(executor):
+    # steps the executor runs at once, ProcessPoolExecutor and ThreadPoolExecutor keep their number of workers
+    return getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+
+
+def _discard_steps(pending, wait=False):
+    """Cancels the submitted steps that are not taken, the results of the finished ones are stored in synthesis_cache.
+
+    Parameters:
+        pending ({int: (GraphHandle, _Probe, Future)}): Steps returned by _submit_steps
+        wait (bool): Wait for the steps that are already running and store their results as well
+
+    Returns:
+        Nothing
+    """
+
+    for _, probe, results in pending.values():
+        if not isinstance(results, Future) or results.cancel():
+            continue
+        if (wait or results.done()) and results.exception() is None:
+            synthesis_cache.store(probe, results.result())
+    pending.clear()
+
+
+def _step_results(
+    pending, edge, changed_graph, formula, executor, fanout_threshold, window=None
+):
+    """Returns the results of synthesis for one step of a possible or necessary formula, taken from the submitted steps if there.
+
+    Parameters:
+        pending ({int: (GraphHandle, _Probe, Future)}): Steps returned by _submit_steps
+        edge (int): Edge of the step
+        changed_graph (GraphHandle): Graph with the target of the edge as initial node
+        formula (Token): Subformula of the possible or necessary formula
+        executor (concurrent.futures.Executor): Executor for steps that are not submitted yet
+        fanout_threshold (int): Minimum synthesis_cost of a step that is submitted
+        window (int): Window the steps were submitted with
 
     Returns:
-        return_list ([igraph.Graph]): A list of graphs satisfying the input formula
+        result_list ([GraphHandle]): A list of graphs satisfying the subformula
     """
 
+    submitted_graph, probe, results = pending.pop(edge, (None, None, None))
+    if probe is None:
+        results = synthesis([changed_graph], formula, executor, fanout_threshold)
+        _fill_steps(pending, formula, executor, window)
+        return results
+
+    if not isinstance(results, list):
+        results = results.result()
+        synthesis_cache.store(probe, results)
+    # the step is only replaced once it is done, so at most window steps run at once
+    _fill_steps(pending, formula, executor, window)
+
+    missing_flags = changed_graph.remove - submitted_graph.remove
+    if missing_flags:
+        # results that kept the flags of the submitted graph also get the remove flags set since
+        for result in results:
+            original_ids = result.original_edge_ids(submitted_graph)
+            if original_ids is None:
+                continue
+            result_ids = {original: kept for kept, original in enumerate(original_ids)}
+            if result_ids.get(edge) in result.processed:
+                result.remove.update(
+                    result_ids[flagged]
+                    for flagged in missing_flags
+                    if flagged in result_ids
+                )
+    return results
+
+
+def _synthesis(
+    graph_list, formula, executor, fanout_threshold, lazy=False, budget=None
+):
+    """Yields altered versions of the input graphs that satisfy the input formula, without using the cache for the input graphs.
+
+    Parameters:
+        graph_list ([GraphHandle]): A list of copy-on-write graph handles
+        formula (Token): A formula
+        executor (concurrent.futures.Executor): Executor the steps of possible and necessary formulas are run in
+        fanout_threshold (int): Minimum synthesis_cost of a step that is run in the executor
+        lazy (bool): Synthesize subformulas with iter_synthesis instead of synthesis
+        budget (Budget): Limits checked in every loop, passed on to iter_synthesis
+
+    Yields:
+        result (GraphHandle): A graph satisfying the input formula
+    """
+
+    if budget is None:
+        budget = _no_budget
+
+    def subsynthesis(graphs, subformula):
+        if lazy:
+            return iter_synthesis(graphs, subformula, budget)
+        return synthesis(graphs, subformula, executor, fanout_threshold)
+
     if formula.ident == Token.ID_TRUE:
         # no changes needed, return unchanged LTSs
-        return graph_list
+        yield from graph_list
+        return
 
     if formula.ident == Token.ID_FALSE:
         # yields no results
-        return []
+        return
 
     if formula.ident == Token.ID_OR:
         # try both parts seperately, return union of the resulting lists
-        left_results = list(filter(None, synthesis(graph_list, formula.first)))
-        for result in left_results:
-            result = remove_disconnected_vertices(result)
+        result_index = GraphIndex()
+        for result in subsynthesis(graph_list, formula.first):
+            budget.check()
+            if result and result_index.add(result):
+                yield result
 
         for graph in graph_list:
-            reset_edge_attributes(graph)
+            graph.reset_flags()
 
-        right_results = list(filter(None, synthesis(graph_list, formula.second)))
-        for result in right_results:
-            result = remove_disconnected_vertices(result)
+        for result in subsynthesis(graph_list, formula.second):
+            budget.check()
+            if result and result_index.add(result):
+                yield result
+        return
 
-        result_list = []
-        for result in left_results:
-            if not isomorphic_in_list(result, result_list):
-                result_list.append(result)
-        for result in right_results:
-            if not isomorphic_in_list(result, result_list):
-                result_list.append(result)
+    if formula.ident == Token.ID_AND:
+        # every result of one conjunct is synthesized once against the other conjunct, a graph that comes back unchanged satisfies both
+        conjuncts = (formula.first, formula.second)
+        seen = (set(), set())
+        result_index = GraphIndex()
+        queue = deque()
+        try:
+            for first_result in subsynthesis(graph_list, formula.first):
+                if first_result:
+                    queue.append((first_result, 1))
+                    budget.add_live_graphs(1)
+                while queue:
+                    budget.check()
+                    current_graph, conjunct = queue.popleft()
+                    budget.add_live_graphs(-1)
+                    current_form = current_graph.rooted_form()
+                    if current_form in seen[conjunct]:
+                        continue
+                    seen[conjunct].add(current_form)
+                    # a lazily synthesized conjunct may still change the flags of the graphs it yielded
+                    current_graph = current_graph.branch()
+                    current_graph.reset_flags()
+
+                    for result in subsynthesis([current_graph], conjuncts[conjunct]):
+                        if not result:
+                            continue
+                        if result.rooted_form() == current_form:
+                            if result_index.add(current_graph):
+                                yield current_graph
+                        else:
+                            queue.append((result, 1 - conjunct))
+                            budget.add_live_graphs(1)
+        finally:
+            budget.add_live_graphs(-len(queue))
+        return
+
+    def step_results(pending, edge, changed_graph, window=None):
+        if lazy:
+            return iter_synthesis([changed_graph], formula.second, budget)
+        return _step_results(
+            pending,
+            edge,
+            changed_graph,
+            formula.second,
+            executor,
+            fanout_threshold,
+            window,
+        )
 
-        return result_list
+    if formula.ident == Token.ID_NECESSARY:
+        # Try each e step, if none is successful remove edge, otherwise change edge recursively if needed
+        queue = [graph.branch() for graph in graph_list]
+        queue_index = GraphIndex(queue)
+        return_index = GraphIndex()
+        pending = {}
+        # the loop stops at the first step whose results replace the graph, so only one step per worker is submitted ahead of it
+        window = _worker_count(executor)
+        try:
+            budget.add_live_graphs(len(queue))
+            while queue:
+                current_graph = queue[0]
+                pending = _submit_steps(
+                    current_graph, formula, executor, fanout_threshold, window
+                )
+                for edge in current_graph.out_edges(label=formula.first):
+                    budget.check()
+                    if edge not in current_graph.processed:
+                        current_graph.processed.add(edge)
+                        changed_graph = current_graph.branch(current_graph.target(edge))
+                        result_list = list(
+                            filter(
+                                None,
+                                step_results(pending, edge, changed_graph, window),
+                            )
+                        )
+                        if result_list:
+                            for result in result_list:
+                                result.initial = current_graph.initial
+                                if (result not in queue_index) and (
+                                    result not in return_index
+                                ):
+                                    queue.append(result)
+                                    queue_index.add(result)
+                                    budget.add_live_graphs(1)
+                                    if current_graph in queue:
+                                        queue.remove(current_graph)
+                                        queue_index.remove(current_graph)
+                                        budget.add_live_graphs(-1)
+                            if current_graph not in queue:
+                                # the changed graphs take over the remaining steps
+                                break
+                        else:
+                            current_graph.remove.add(edge)
+                # the graphs that took over the remaining steps find the running ones in the cache
+                _discard_steps(pending, wait=True)
+                if current_graph in queue:
+                    current_graph.delete_edges(current_graph.remove)
+                    queue.remove(current_graph)
+                    queue_index.remove(current_graph)
+                    budget.add_live_graphs(-1)
+                    if return_index.add(current_graph):
+                        yield current_graph
+        finally:
+            _discard_steps(pending)
+            budget.add_live_graphs(-len(queue))
+        return
 
-    if formula.ident == Token.ID_AND:
-        result_list = list(filter(None, synthesis(graph_list, formula.first)))
-        for result in result_list:
-            result = remove_disconnected_vertices(result)
-            reset_edge_attributes(result)
+    if formula.ident == Token.ID_POSSIBLE:
+        # Try each e step, if none is successful, treat it as a false, include modified and non-modified version
+        queue = [graph.branch() for graph in graph_list]
+        return_index = GraphIndex()
+        pending = {}
+        try:
+            budget.add_live_graphs(len(queue))
+            while queue:
+                current_graph = queue[0]
+                pending = _submit_steps(
+                    current_graph, formula, executor, fanout_threshold
+                )
+                for edge in current_graph.out_edges(label=formula.first):
+                    budget.check()
+                    if edge not in current_graph.processed:
+                        current_graph.processed.add(edge)
+                        changed_graph = current_graph.branch(current_graph.target(edge))
+                        for result in step_results(pending, edge, changed_graph):
+                            if not result:
+                                continue
+                            subgraph = result.pruned()
+                            if not current_graph.successor_exists(
+                                subgraph, formula.first
+                            ):
+                                combined_graph = current_graph.attach(
+                                    subgraph, formula.first
+                                )
+                                return_index.add(combined_graph)
+                                yield combined_graph
+                            elif return_index.add(current_graph):
+                                yield current_graph
+                queue.remove(current_graph)
+                budget.add_live_graphs(-1)
+        finally:
+            _discard_steps(pending)
+            budget.add_live_graphs(-len(queue))
 
-        if not result_list:
-            return []
 
-        while True:
-            second_result_list = list(
-                filter(None, synthesis(graph_list, formula.second))
-            )
-            for result in second_result_list:
-                result = remove_disconnected_vertices(result)
+def synthesis_cost(graph, formula):
+    """Returns an estimate of the work of synthesis on a graph, the number of edges times the size of the formula.
 
-            if not second_result_list:
-                return []
+    Parameters:
+        graph (GraphHandle): A graph
+        formula (Token): A formula
 
-            # lists are same, which means we're finished
-            if lists_same(result_list, second_result_list):
-                return result_list
+    Returns:
+        cost (int): Estimated cost
+    """
 
-            # lists are not same, another iteration
-            for second_result in second_result_list:
-                reset_edge_attributes(second_result)
+    return (graph.ecount() + 1) * formula.size
 
-            third_result_list = list(filter(None, synthesis(graph_list, formula.first)))
-            for result in third_result_list:
-                result = remove_disconnected_vertices(result)
-                reset_edge_attributes(result)
 
-            if not third_result_list:
-                return []
+def _synthesis_worker(graph, formula):
+    return list(filter(None, synthesis([graph], formula)))
 
-            # lists are same, which means we're finished
-            if lists_same(second_result_list, third_result_list):
-                return second_result_list
 
-            # now comparing result_list and third_result_list - if same, then we're stuck in an endless loop and formula is not satisfyable
-            if lists_same(result_list, third_result_list):
-                return []
+def submit_synthesis(executor, graph, formula, fanout_threshold=FANOUT_THRESHOLD):
+    """Submits synthesis on a single graph to the worker processes of an executor.
 
-            # list are not same, another iteration
-            result_list = deepcopy(third_result_list)
+    Disjunctions with a synthesis_cost of at least fanout_threshold are split, and both sides are submitted separately, recursively. The input graph must not have flagged edges, so both sides start from the same graph as in synthesis.
 
-    if formula.ident == Token.ID_NECESSARY:
-        # Try each e step, if none is successful remove edge, otherwise change edge recursively if needed
-        queue = deepcopy(graph_list)
-        return_list = []
-        while queue:
-            current_graph = queue[0]
-            for edge in current_graph.es[
-                current_graph.incident(current_graph["initial"], mode="out")
-            ]:
-                if edge["label"] == formula.first and not edge["processed"]:
-                    edge["processed"] = True
-                    changed_graph = deepcopy(current_graph)
-                    changed_graph["initial"] = edge.target
-                    result_list = synthesis([changed_graph], formula.second)
-                    if result_list:
-                        result_list = list(filter(None, result_list))
-                    else:
-                        result_list = []
-                    if result_list:
-                        for result in result_list:
-                            result["initial"] = current_graph["initial"]
-                            if (not isomorphic_in_list(result, queue)) and (
-                                not isomorphic_in_list(result, return_list)
-                            ):
-                                queue.append(result)
-                                if current_graph in queue:
-                                    queue.remove(current_graph)
-                    else:
-                        edge["remove"] = True
-            if current_graph in queue:
-                edges_remove = []
-                for edge in current_graph.es:
-                    if edge["remove"]:
-                        edges_remove.append(edge.index)
-                current_graph.delete_edges(edges_remove)
-                if not isomorphic_in_list(current_graph, return_list):
-                    return_list.append(current_graph)
-                queue.remove(current_graph)
+    Parameters:
+        executor (concurrent.futures.Executor): Executor running the synthesis calls
+        graph (GraphHandle): A graph
+        formula (Token): A formula
+        fanout_threshold (int): Minimum cost of a disjunction that is split
+
+    Returns:
+        submitted (Future or tuple): A future, or a pair of submitted disjuncts, to be passed to collect_synthesis
+    """
 
-        return return_list
+    if (
+        formula.ident == Token.ID_OR
+        and synthesis_cost(graph, formula) >= fanout_threshold
+    ):
+        return (
+            submit_synthesis(executor, graph, formula.first, fanout_threshold),
+            submit_synthesis(executor, graph, formula.second, fanout_threshold),
+        )
+    return executor.submit(_synthesis_worker, graph, formula)
 
-    if formula.ident == Token.ID_POSSIBLE:
-        # Try each e step, if none is successful, treat it as a false, include modified and non-modified version
-        queue = deepcopy(graph_list)
-        return_list = []
-        while queue:
-            current_graph = queue[0]
-            for edge in current_graph.es[
-                current_graph.incident(current_graph["initial"], mode="out")
-            ]:
-                if edge["label"] == formula.first and not edge["processed"]:
-                    edge["processed"] = True
-                    changed_graph = deepcopy(current_graph)
-                    changed_graph["initial"] = edge.target
-                    result_list = synthesis([changed_graph], formula.second)
-                    if result_list:
-                        result_list = list(filter(None, result_list))
-                    else:
-                        result_list = []
-                    if result_list:
-                        for result in result_list:
-                            subgraph = remove_disconnected_vertices(result)
-                            if not subgraph_exists_in_graph(
-                                subgraph, current_graph, edge["label"]
-                            ):
-                                return_list.append(
-                                    add_subgraph_to_graph(
-                                        subgraph, current_graph, edge["label"]
-                                    )
-                                )
-                            elif not isomorphic_in_list(current_graph, return_list):
-                                return_list.append(current_graph)
-            queue.remove(current_graph)
 
-        return return_list
+def collect_synthesis(submitted):
+    """Waits for submitted synthesis calls and merges split disjunctions like synthesis does.
 
+    Parameters:
+        submitted (Future or tuple): Return value of submit_synthesis
 
-def generate_distinguished_graphs(formula_str, graph_filename="default_graph"):
+    Returns:
+        results ([GraphHandle]): A list of graphs satisfying the submitted formula
+    """
+
+    if not isinstance(submitted, tuple):
+        return submitted.result()
+
+    result_index = GraphIndex()
+    for part in submitted:
+        for result in collect_synthesis(part):
+            result_index.add(result)
+    return list(result_index)
+
+
+def generate_distinguished_graphs(
+    formula_str,
+    graph_filename="default_graph",
+    jobs=1,
+    executor=None,
+    fanout_threshold=FANOUT_THRESHOLD,
+    edge_parallel=False,
+    budget=None,
+    selective_unfolding=False,
+    minimize_input=False,
+    dedup="isomorphism",
+):
     """Returns the results of synthesis with satisfying and non satisfying formulas.
 
     Parameters:
         graph_filename (str): Name of file where graph is saved
         formula_str (str): A formula in string representation
+        jobs (int): Number of worker processes, synthesis runs in this process if 1
+        executor (concurrent.futures.Executor): Executor to run synthesis in instead of a new process pool
+        fanout_threshold (int): Minimum synthesis_cost of a disjunction or step that is run in a separate worker
+        edge_parallel (bool): Run synthesis in this process and only the steps of possible and necessary formulas in the workers
+        budget (Budget): Limits of the run, synthesis runs lazily in this process if given and returns the results found until budget.exceeded was set
+        selective_unfolding (bool): Only unfold the edges the formula can look at, see unfold_graph_selectively
+        minimize_input (bool): Replace the input graph by its quotient by bisimulation before unfolding, see minimize_graph
+        dedup (str): "isomorphism" to return pairwise non isomorphic results, "bisimulation" to return results whose initial nodes are pairwise not bisimilar
 
     Returns:
         satisfying_results ([igraph.Graph]): A list of graphs satisfying the input formula combined with shallower formulas with and
@@ -199,17 +502,47 @@ def generate_distinguished_graphs(formula_str, graph_filename="default_graph"):
         _,
         satisfying_results,
         non_satisfying_results,
-    ) = generate_distinguished_graphs_testing(formula_str, graph_filename)
+    ) = generate_distinguished_graphs_testing(
+        formula_str,
+        graph_filename,
+        jobs,
+        executor,
+        fanout_threshold,
+        edge_parallel,
+        budget,
+        selective_unfolding,
+        minimize_input,
+        dedup,
+    )
 
     return satisfying_results, non_satisfying_results
 
 
-def generate_distinguished_graphs_testing(formula_str, graph_filename="default_graph"):
+def generate_distinguished_graphs_testing(
+    formula_str,
+    graph_filename="default_graph",
+    jobs=1,
+    executor=None,
+    fanout_threshold=FANOUT_THRESHOLD,
+    edge_parallel=False,
+    budget=None,
+    selective_unfolding=False,
+    minimize_input=False,
+    dedup="isomorphism",
+):
     """Returns the results of synthesis with satisfying and non satisfying formulas and other things for testing/printing.
 
     Parameters:
         graph_filename (str): Name of file where graph is saved
         formula_str (str): A formula in string representation
+        jobs (int): Number of worker processes, synthesis runs in this process if 1
+        executor (concurrent.futures.Executor): Executor to run synthesis in instead of a new process pool
+        fanout_threshold (int): Minimum synthesis_cost of a disjunction or step that is run in a separate worker
+        edge_parallel (bool): Run synthesis in this process and only the steps of possible and necessary formulas in the workers
+        budget (Budget): Limits of the run, synthesis runs lazily in this process if given and returns the results found until budget.exceeded was set
+        selective_unfolding (bool): Only unfold the edges the formula can look at, see unfold_graph_selectively
+        minimize_input (bool): Replace the input graph by its quotient by bisimulation before unfolding, see minimize_graph
+        dedup (str): "isomorphism" to return pairwise non isomorphic results, "bisimulation" to return results whose initial nodes are pairwise not bisimilar
 
     Returns:
         input_graph (igraph.Graph): The input graph
@@ -225,22 +558,202 @@ def generate_distinguished_graphs_testing(formula_str, graph_filename="default_g
     negated_formula = negate_formula(formula)
     negated_formula_str = formula_to_str(negated_formula)
 
-    depth = depth_formula(formula)
+    input_graph = open_graph(graph_filename)
+    color_graph(input_graph)
+    unfolded_graph = _unfold(
+        [formula], input_graph, selective_unfolding, minimize_input
+    )
+
+    if executor is None and jobs > 1 and budget is None:
+        with ProcessPoolExecutor(max_workers=jobs) as process_pool:
+            (
+                final_satisfying_results,
+                final_non_satisfying_results,
+            ) = _distinguished_graphs(
+                unfolded_graph,
+                formula,
+                negated_formula,
+                process_pool,
+                fanout_threshold,
+                edge_parallel,
+                budget,
+                dedup,
+            )
+    else:
+        (
+            final_satisfying_results,
+            final_non_satisfying_results,
+        ) = _distinguished_graphs(
+            unfolded_graph,
+            formula,
+            negated_formula,
+            executor,
+            fanout_threshold,
+            edge_parallel,
+            budget,
+            dedup,
+        )
+
+    return (
+        input_graph,
+        unfolded_graph,
+        formula_str,
+        negated_formula_str,
+        final_satisfying_results,
+        final_non_satisfying_results,
+    )
+
+
+def generate_distinguished_graphs_batch(
+    formulas,
+    graph_filename="default_graph",
+    jobs=1,
+    executor=None,
+    fanout_threshold=FANOUT_THRESHOLD,
+    edge_parallel=False,
+    budget=None,
+    selective_unfolding=False,
+    minimize_input=False,
+    dedup="isomorphism",
+):
+    """Returns the results of synthesis with satisfying and non satisfying formulas for many formulas and one graph.
+
+    The graph is read and unfolded once, to the largest depth of the formulas or, with selective_unfolding, along the labels any of the formulas looks at, and every formula is synthesized on that unfolding. Synthesis of common subformulas on the same part of the unfolding is shared through synthesis_cache. Unfolding deeper than a formula needs does not change which processes satisfy it, but the results can have more tree nodes than those of generate_distinguished_graphs.
+
+    Parameters:
+        formulas ([str] or str): Formulas in string representation, or the name of a file with one formula per line
+        graph_filename (str): Name of file where graph is saved
+        jobs (int): Number of worker processes shared by all formulas, synthesis runs in this process if 1
+        executor (concurrent.futures.Executor): Executor to run synthesis in instead of a new process pool
+        fanout_threshold (int): Minimum synthesis_cost of a disjunction or step that is run in a separate worker
+        edge_parallel (bool): Run synthesis in this process and only the steps of possible and necessary formulas in the workers
+        budget (Budget): Limits of the whole batch, synthesis runs lazily in this process if given and formulas after budget.exceeded was set get no results
+        selective_unfolding (bool): Only unfold the edges the formula can look at, see unfold_graph_selectively
+        minimize_input (bool): Replace the input graph by its quotient by bisimulation before unfolding, see minimize_graph
+        dedup (str): "isomorphism" to return pairwise non isomorphic results, "bisimulation" to return results whose initial nodes are pairwise not bisimilar
+
+    Returns:
+        results ([([igraph.Graph], [igraph.Graph])]): Satisfying and non satisfying results of every formula, in the order of the formulas
+    """
+
+    if isinstance(formulas, str):
+        formulas = read_formulas(formulas)
+    parsed_formulas = [minimize_formula(parse(formula_str)) for formula_str in formulas]
 
     input_graph = open_graph(graph_filename)
     color_graph(input_graph)
-    unfolded_graph = unfold_graph(input_graph, depth)
+    unfolded_graph = _unfold(
+        parsed_formulas, input_graph, selective_unfolding, minimize_input
+    )
+
+    def run_batch(executor):
+        return [
+            _distinguished_graphs(
+                unfolded_graph,
+                formula,
+                negate_formula(formula),
+                executor,
+                fanout_threshold,
+                edge_parallel,
+                budget,
+                dedup,
+            )
+            for formula in parsed_formulas
+        ]
+
+    if executor is None and jobs > 1 and budget is None:
+        with ProcessPoolExecutor(max_workers=jobs) as process_pool:
+            return run_batch(process_pool)
+    return run_batch(executor)
+
+
+def _dedup_key(dedup):
+    # form the results are compared on, None for the canonical form
+    if dedup == "isomorphism":
+        return None
+    if dedup == "bisimulation":
+        return bisimulation_form
+    raise ValueError(
+        "dedup must be 'isomorphism' or 'bisimulation', not " + repr(dedup)
+    )
+
+
+def _unfold(formulas, input_graph, selective_unfolding=False, minimize_input=False):
+    # unfolds the input graph far enough for all formulas and resets the edge flags
+    if minimize_input:
+        input_graph = minimize_graph(input_graph)
+    if selective_unfolding:
+        tree = {}
+        for formula in formulas:
+            tree = merge_label_trees(tree, label_tree(formula))
+        unfolded_graph = unfold_graph_selectively(input_graph, tree)
+    else:
+        depth = max((depth_formula(formula) for formula in formulas), default=0)
+        unfolded_graph = unfolding_cache.unfold(input_graph, depth)
     reset_edge_attributes(unfolded_graph)
+    return unfolded_graph
+
 
-    unfiltered_satisfying_results = []
+def read_formulas(filename):
+    """Returns the formulas in a file, one per line, empty lines and lines starting with # are skipped.
+
+    Parameters:
+        filename (str): Path of the file
+
+    Returns:
+        formulas ([str]): Formulas in string representation
+    """
+
+    with open(filename, encoding="utf-8") as formula_file:
+        return [
+            line.strip()
+            for line in formula_file
+            if line.strip() and not line.strip().startswith("#")
+        ]
+
+
+def _distinguished_graphs(
+    unfolded_graph,
+    formula,
+    negated_formula,
+    executor,
+    fanout_threshold,
+    edge_parallel,
+    budget,
+    dedup="isomorphism",
+):
+    # synthesis with both formulas on an unfolded graph, with results post-processed like generate_distinguished_graphs returns them
+    key = _dedup_key(dedup)
+    unfiltered_satisfying_results = GraphIndex(key=key)
     unfiltered_non_satisfying_results = []
 
-    for result in synthesis([unfolded_graph], formula):
-        if not isomorphic_in_list(result, unfiltered_satisfying_results):
-            unfiltered_satisfying_results.append(result)
-    for result in synthesis([unfolded_graph], negated_formula):
-        if not isomorphic_in_list(result, unfiltered_satisfying_results):
-            unfiltered_non_satisfying_results.append(result)
+    if budget is not None:
+        satisfying, non_satisfying = [], []
+        for is_satisfying, result in _distinguish(
+            unfolded_graph, formula, negated_formula, budget=budget, dedup=dedup
+        ):
+            (satisfying if is_satisfying else non_satisfying).append(result)
+    else:
+        satisfying, non_satisfying = _run_synthesis(
+            unfolded_graph,
+            formula,
+            negated_formula,
+            executor,
+            fanout_threshold,
+            edge_parallel,
+        )
+
+    for result in satisfying:
+        unfiltered_satisfying_results.add(result)
+    if key is None:
+        for result in non_satisfying:
+            if result not in unfiltered_satisfying_results:
+                unfiltered_non_satisfying_results.append(result)
+    else:
+        # bisimilar results of synthesis with a formula are only told apart by isomorphism, so they are reduced here
+        unfiltered_non_satisfying_results = GraphIndex(key=key)
+        for result in non_satisfying:
+            unfiltered_non_satisfying_results.add(result)
 
     satisfying_results = list(filter(None, unfiltered_satisfying_results))
     non_satisfying_results = list(filter(None, unfiltered_non_satisfying_results))
@@ -248,20 +761,138 @@ def generate_distinguished_graphs_testing(formula_str, graph_filename="default_g
     final_satisfying_results = []
     final_non_satisfying_results = []
     # post-processing: removing unreachable vertices and coloring graphs
-    for graph in satisfying_results:
-        graph = remove_disconnected_vertices(graph)
-        color_graph(graph)
-        final_satisfying_results.append(graph)
-    for graph in non_satisfying_results:
-        graph = remove_disconnected_vertices(graph)
-        color_graph(graph)
-        final_non_satisfying_results.append(graph)
+    for handle in satisfying_results:
+        final_satisfying_results.append(_result_graph(handle))
+    for handle in non_satisfying_results:
+        final_non_satisfying_results.append(_result_graph(handle))
 
-    return (
-        input_graph,
-        unfolded_graph,
-        formula_str,
-        negated_formula_str,
-        final_satisfying_results,
-        final_non_satisfying_results,
+    return final_satisfying_results, final_non_satisfying_results
+
+
+def iter_distinguished_graphs(
+    formula_str,
+    graph="default_graph",
+    limit=None,
+    budget=None,
+    selective_unfolding=False,
+    minimize_input=False,
+    dedup="isomorphism",
+):
+    """Yields graphs satisfying the input formula and graphs satisfying its negation as soon as they are found.
+
+    Both formulas are synthesized lazily with iter_synthesis and take turns, so the first two graphs are a satisfying and a non satisfying one if both exist. Stopping the iteration stops the synthesis.
+
+    Parameters:
+        formula_str (str): A formula in string representation
+        graph (str or igraph.Graph): Name of file where graph is saved, or a graph with an initial node
+        limit (int): Maximum number of satisfying and of non satisfying graphs, no limit if None
+        budget (Budget): Limits of the run, the iteration stops once budget.exceeded is set
+        selective_unfolding (bool): Only unfold the edges the formula can look at, see unfold_graph_selectively
+        minimize_input (bool): Replace the input graph by its quotient by bisimulation before unfolding, see minimize_graph
+        dedup (str): "isomorphism" to return pairwise non isomorphic results, "bisimulation" to return results whose initial nodes are pairwise not bisimilar
+
+    Yields:
+        satisfying (bool): True if the graph satisfies the input formula, False if it satisfies the negated input formula
+        graph (igraph.Graph): A graph without unreachable nodes, pairwise non isomorphic to the graphs yielded with the same flag
+    """
+
+    formula = minimize_formula(parse(formula_str))
+    negated_formula = negate_formula(formula)
+
+    if isinstance(graph, str):
+        input_graph = open_graph(graph)
+    else:
+        input_graph = graph.copy()
+        input_graph["initial"] = int(graph["initial"])
+    unfolded_graph = _unfold(
+        [formula], input_graph, selective_unfolding, minimize_input
     )
+
+    for satisfying, result in _distinguish(
+        unfolded_graph, formula, negated_formula, limit, budget, dedup
+    ):
+        yield satisfying, _result_graph(result)
+
+
+def _distinguish(
+    unfolded_graph,
+    formula,
+    negated_formula,
+    limit=None,
+    budget=None,
+    dedup="isomorphism",
+):
+    # alternates between lazy synthesis of both formulas until they are done, limit is reached or the budget is exceeded
+    if budget is None:
+        budget = Budget()
+    # only the dedup keys of the yielded results are kept, the results themselves are left to the caller
+    key = _dedup_key(dedup) or canonical_form
+    searches = [
+        (True, iter_synthesis([GraphHandle(unfolded_graph)], formula, budget), set()),
+        (
+            False,
+            iter_synthesis([GraphHandle(unfolded_graph)], negated_formula, budget),
+            set(),
+        ),
+    ]
+    if limit is not None and limit <= 0:
+        searches = []
+    try:
+        while searches:
+            for search in list(searches):
+                satisfying, results, seen_keys = search
+                for result in results:
+                    if not result:
+                        continue
+                    result_key = key(result)
+                    if result_key not in seen_keys:
+                        if not budget.add_result():
+                            return
+                        seen_keys.add(result_key)
+                        yield satisfying, result
+                        break
+                else:
+                    searches.remove(search)
+                    continue
+                if len(seen_keys) == limit:
+                    results.close()
+                    searches.remove(search)
+    except BudgetExceeded:
+        return
+    finally:
+        for _, results, _ in searches:
+            results.close()
+
+
+def _result_graph(handle):
+    # post-processing: removing unreachable vertices and coloring graphs
+    graph = handle.pruned().to_graph()
+    color_graph(graph)
+    return graph
+
+
+def _run_synthesis(
+    unfolded_graph, formula, negated_formula, executor, fanout_threshold, edge_parallel
+):
+    if executor is None or edge_parallel:
+        return (
+            synthesis(
+                [GraphHandle(unfolded_graph)], formula, executor, fanout_threshold
+            ),
+            synthesis(
+                [GraphHandle(unfolded_graph)],
+                negated_formula,
+                executor,
+                fanout_threshold,
+            ),
+        )
+    # both formulas are submitted before waiting for either of them
+    submitted = [
+        submit_synthesis(
+            executor, GraphHandle(unfolded_graph), formula, fanout_threshold
+        ),
+        submit_synthesis(
+            executor, GraphHandle(unfolded_graph), negated_formula, fanout_threshold
+        ),
+    ]
+    return [collect_synthesis(part) for part in submitted]
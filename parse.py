@@ -33,27 +33,27 @@ def parse_formula(formula):
         # Get rid of '('
         formula = formula[1:]
 
-        result = Token(Token.ID_ERROR)
-
         try:
-            result.first, formula = parse_formula(formula)
+            first, formula = parse_formula(formula)
         except ParseException as e:
             raise e
 
         if formula[:3] == 'and':
-            result.change(Token.ID_AND)
+            ident = Token.ID_AND
             formula = formula[3:]
         elif formula[:2] == 'or':
-            result.change(Token.ID_OR)
+            ident = Token.ID_OR
             formula = formula[2:]
         else:
             raise ParseException('Unknown binary operation!')
 
         try:
-            result.second, formula = parse_formula(formula)
+            second, formula = parse_formula(formula)
         except ParseException as e:
             raise e
 
+        result = Token(ident, first, second)
+
         # Get rid of ')'
         if formula[0] == ')':
             formula = formula[1:]
@@ -67,10 +67,8 @@ def parse_formula(formula):
         # Get rid of '<'
         formula = formula[1:]
 
-        result = Token(Token.ID_POSSIBLE)
         try:
             label, formula = parse_label(formula)
-            result.set_first(label)
         except ParseException as e:
             raise e
 
@@ -81,7 +79,7 @@ def parse_formula(formula):
             raise ParseException('> missing!')
 
         rest, formula = parse_formula(formula)
-        result.set_second(rest)
+        result = Token(Token.ID_POSSIBLE, label, rest)
 
     # [ LABEL ] FORMULA
     elif formula[0] == '[':
@@ -90,10 +88,8 @@ def parse_formula(formula):
         # Get rid of '['
         formula = formula[1:]
 
-        result = Token(Token.ID_NECESSARY)
         try:
             label, formula = parse_label(formula)
-            result.set_first(label)
         except ParseException as e:
             raise e
 
@@ -104,7 +100,7 @@ def parse_formula(formula):
             raise ParseException('] missing!')
 
         rest, formula = parse_formula(formula)
-        result.set_second(rest)
+        result = Token(Token.ID_NECESSARY, label, rest)
 
     # ERROR
     else:
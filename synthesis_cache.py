@@ -0,0 +1,213 @@
+# pylint: disable=missing-module-docstring, c0301, r0914
+
+from collections import OrderedDict
+
+
+class SynthesisCache:
+    """A bounded least recently used memo table for synthesis results.
+
+    Entries are keyed on the rooted canonical form of the part of a graph that is reachable from its initial node together with the subformula. Synthesis returns whole graphs that still contain the unreachable part of their input, so every result is stored as an edit of the reachable part in canonical node and edge indices and replayed on the graph of a later call.
+
+    Parameters:
+        maxsize (int): Maximum number of stored entries
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def lookup(self, graph, formula):
+        """Returns the cached results for a graph and a formula.
+
+        Parameters:
+            graph (GraphHandle): A graph
+            formula (Token): A formula
+
+        Returns:
+            results ([GraphHandle]): Results replayed on the input graph, None if there is no entry
+            probe (_Probe): Canonical labelling of the input graph, to be passed to store
+        """
+
+        probe = _Probe(graph, formula)
+        if probe.key is None:
+            return None, probe
+
+        scripts = self._entries.get(probe.key)
+        if scripts is None:
+            self.misses += 1
+            return None, probe
+
+        self.hits += 1
+        self._entries.move_to_end(probe.key)
+        return [probe.replay(script) for script in scripts], probe
+
+    def store(self, probe, results):
+        """Stores the results of a synthesis call that missed the cache.
+
+        Parameters:
+            probe (_Probe): Probe returned by lookup for the input graph
+            results ([GraphHandle]): Results of synthesis on the input graph
+
+        Returns:
+            Nothing
+        """
+
+        if probe.key is None:
+            return
+        scripts = []
+        for result in results:
+            script = probe.record(result)
+            if script is None:
+                # the result is not an edit of the reachable part, so the entry cannot be replayed
+                return
+            scripts.append(script)
+
+        self._entries[probe.key] = scripts
+        self._entries.move_to_end(probe.key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes all entries and resets the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Returns the hit and miss counters and the number of stored entries."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+class _Probe:
+    """Canonical labelling of the part of a graph reachable from its initial node.
+
+    Parameters:
+        graph (GraphHandle): A graph
+        formula (Token): A formula
+    """
+
+    def __init__(self, graph, formula):
+        self.graph = graph
+        self.key = None
+        self.vertex_count = graph.vcount()
+        self.edge_count = graph.ecount()
+
+        form, self.vertex_to_canonical, self.edge_to_canonical = (
+            graph.reachable_labelling()
+        )
+        # flags inside the reachable part change the result, such calls are not cached
+        if graph.processed.intersection(
+            self.edge_to_canonical
+        ) or graph.remove.intersection(self.edge_to_canonical):
+            return
+
+        self.outside_processed = frozenset(graph.processed)
+        self.outside_remove = frozenset(graph.remove)
+        # results either keep or clear the flags outside the reachable part, which can only be told apart if there are any
+        self.key = (
+            form,
+            formula,
+            bool(self.outside_processed),
+            bool(self.outside_remove),
+        )
+
+    def record(self, result):
+        """Returns the edit script turning the input graph into the result, None if there is none."""
+
+        result_lts = result.lts
+        result_vertex_count = result_lts.vertex_count
+        result_edges = result_lts.edge_list()
+        result_labels = result_lts.labels
+
+        original_ids = result.original_edge_ids(self.graph)
+        if original_ids is None:
+            return None
+        survivors = len(original_ids)
+        deleted = set(range(self.edge_count)) - set(original_ids)
+        if not deleted <= self.edge_to_canonical.keys():
+            return None
+
+        def vertex_reference(vertex):
+            if vertex >= self.vertex_count:
+                return self.vertex_count - vertex - 1
+            return self.vertex_to_canonical.get(vertex)
+
+        appended_edges = []
+        for source, target in result_edges[survivors:]:
+            appended_edges.append((vertex_reference(source), vertex_reference(target)))
+        initial = vertex_reference(result.initial)
+        if initial is None or None in (
+            vertex for appended_edge in appended_edges for vertex in appended_edge
+        ):
+            return None
+
+        flags = []
+        for result_flags, outside_flags in (
+            (result.processed, self.outside_processed),
+            (result.remove, self.outside_remove),
+        ):
+            inside = []
+            outside = set()
+            appended = []
+            for result_edge in result_flags:
+                if result_edge >= survivors:
+                    appended.append(result_edge - survivors)
+                elif original_ids[result_edge] in self.edge_to_canonical:
+                    inside.append(self.edge_to_canonical[original_ids[result_edge]])
+                else:
+                    outside.add(original_ids[result_edge])
+            if outside == outside_flags:
+                kept = True
+            elif not outside:
+                kept = False
+            else:
+                return None
+            flags.append((tuple(inside), tuple(appended), kept))
+
+        return (
+            initial,
+            tuple(self.edge_to_canonical[edge] for edge in deleted),
+            result_vertex_count - self.vertex_count,
+            tuple(appended_edges),
+            tuple(result_labels[survivors:]),
+            tuple(flags),
+        )
+
+    def replay(self, script):
+        """Returns a new handle with the edit script applied to the input graph."""
+
+        initial, deleted, new_vertex_count, appended_edges, labels, flags = script
+        canonical_to_vertex = {
+            canonical: vertex for vertex, canonical in self.vertex_to_canonical.items()
+        }
+        canonical_to_edge = {
+            canonical: edge for edge, canonical in self.edge_to_canonical.items()
+        }
+
+        def vertex(reference):
+            if reference < 0:
+                return self.vertex_count - reference - 1
+            return canonical_to_vertex[reference]
+
+        result = self.graph.branch(vertex(initial))
+        (processed, processed_appended, processed_kept), (
+            remove,
+            remove_appended,
+            remove_kept,
+        ) = flags
+        result.processed = set(self.outside_processed) if processed_kept else set()
+        result.processed.update(canonical_to_edge[edge] for edge in processed)
+        result.remove = set(self.outside_remove) if remove_kept else set()
+        result.remove.update(canonical_to_edge[edge] for edge in remove)
+        result.delete_edges(canonical_to_edge[edge] for edge in deleted)
+        if new_vertex_count or appended_edges:
+            result = result.extend(
+                new_vertex_count,
+                [(vertex(source), vertex(target)) for source, target in appended_edges],
+                labels,
+                processed=processed_appended,
+                remove=remove_appended,
+            )
+        return result
@@ -1,20 +1,69 @@
 # pylint: disable=missing-module-docstring, w0614, w0401, c0116
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
 from igraph import *
 
-from evaluate import evaluate
+from benchmark import (
+    BASE_PARAMETERS,
+    OPERATIONS,
+    benchmark_case,
+    compare_results,
+    family_formula,
+    family_graph,
+)
+from budget import Budget
+from cli import EXIT_TIMEOUT, run
+from corpus import run_corpus
+from evaluate import LocalChecker, check, evaluate
+from formula_functions import negate_formula
+from graph_functions import (
+    bisimulation_form,
+    isomorphic_in_list,
+    lists_same,
+    minimize_graph,
+    open_graph,
+    unfold_graph,
+)
+import corpus
+import main
 from lts import *
-from main import generate_distinguished_graphs_testing
+from main import (
+    generate_distinguished_graphs,
+    generate_distinguished_graphs_batch,
+    generate_distinguished_graphs_testing,
+    iter_distinguished_graphs,
+    synthesis_cache,
+)
 from parse import parse
+from unfolding_cache import UnfoldingCache
+from vector_evaluate import VectorLTS
+from vector_evaluate import evaluate as vector_evaluate
+from workload import graph_labels, random_formula, random_lts
 
 
 def transform_graph_to_lts(graph):
-    lts = LTS()
-    for edge in graph.es():
-        lts.add_transition(str(edge.source), edge["label"], str(edge.target))
-    return lts
+    # only nodes with edges become states
+    edges = graph.get_edgelist()
+    return IndexedLTS.from_edge_arrays(
+        [source for source, _ in edges],
+        graph.es["label"] if edges else [],
+        [target for _, target in edges],
+    )
 
 
-def test(formula_str, graph_filename):
+def test(
+    formula_str,
+    graph_filename,
+    executor=None,
+    edge_parallel=False,
+    selective_unfolding=False,
+    minimize_input=False,
+    dedup="isomorphism",
+):
     (
         graph,
         _,
@@ -22,7 +71,16 @@ def test(formula_str, graph_filename):
         negated_formula,
         results,
         non_results,
-    ) = generate_distinguished_graphs_testing(formula_str, graph_filename)
+    ) = generate_distinguished_graphs_testing(
+        formula_str,
+        graph_filename,
+        executor=executor,
+        fanout_threshold=0,
+        edge_parallel=edge_parallel,
+        selective_unfolding=selective_unfolding,
+        minimize_input=minimize_input,
+        dedup=dedup,
+    )
 
     # If the results are empty, check if the original input did already satisfy the formula
     if not results:
@@ -55,6 +113,56 @@ def test(formula_str, graph_filename):
     return True
 
 
+def test_iter(formula_str, graph_filename, limit=None):
+    counts = {True: 0, False: 0}
+    for satisfying, result in iter_distinguished_graphs(
+        formula_str, graph_filename, limit
+    ):
+        counts[satisfying] += 1
+        lts = transform_graph_to_lts(result)
+        satisfying_vertices = evaluate(parse(formula_str), lts)
+        if satisfying and satisfying_vertices:
+            if str(result["initial"]) not in satisfying_vertices:
+                return False
+        if not satisfying and str(result["initial"]) in satisfying_vertices:
+            return False
+
+    # Check that the number of results of each kind is within the limit
+    return limit is None or max(counts.values()) <= limit
+
+
+def test_batch(formulas, graph_filename):
+    batch_results = generate_distinguished_graphs_batch(formulas, graph_filename)
+    if len(batch_results) != len(formulas):
+        return False
+
+    for formula_str, (results, non_results) in zip(formulas, batch_results):
+        for result in results:
+            lts = transform_graph_to_lts(result)
+            satisfying_vertices = evaluate(parse(formula_str), lts)
+            if (
+                satisfying_vertices
+                and not str(result["initial"]) in satisfying_vertices
+            ):
+                return False
+        for result in non_results:
+            lts = transform_graph_to_lts(result)
+            satisfying_vertices = evaluate(parse(formula_str), lts)
+            if str(result["initial"]) in satisfying_vertices:
+                return False
+    return True
+
+
+def crashing_corpus_worker(formula_str, path):
+    # kills the worker process for one file, like the OOM killer would
+    if path.endswith("crash.GraphML"):
+        os._exit(1)
+    return corpus_worker(formula_str, path)
+
+
+corpus_worker = corpus._corpus_worker
+
+
 files = [
     "default_graph",
     "synthesis_example_1",
@@ -128,24 +236,548 @@ advanced_formulas = [
 edgecase_formulas = [
     "(<a>[b]false and [a]<b>true)",
 ]
+# the conjuncts change the input in different ways, the first two are satisfiable on every file
+conjunction_formulas = [
+    "([a]false and [b]false)",
+    "([b]false and [a]false)",
+    "(<a><b>true and <a>[b]false)",
+]
 
-for file in files:
-    for formula in basic_formulas:
-        assert test(formula, file), (
-            "Test with formula " + formula + " and file " + file + " failed."
-        )
-print("Done with simple tests.")
+# the suite only runs in the main process, worker processes started with spawn import this module
+if __name__ == "__main__":
+    # labels with more than one character, graphs that only differ in their labels
+    first_graph = Graph(n=3, edges=[(0, 1), (1, 2), (2, 0)], directed=True)
+    first_graph.es["label"] = ["tau", "send", "send"]
+    second_graph = Graph(n=3, edges=[(1, 2), (2, 0), (0, 1)], directed=True)
+    second_graph.es["label"] = ["send", "tau", "send"]
+    third_graph = Graph(n=3, edges=[(0, 1), (1, 2), (2, 0)], directed=True)
+    third_graph.es["label"] = ["tau", "tau", "send"]
+    assert isomorphic_in_list(second_graph, [third_graph, first_graph])
+    assert not isomorphic_in_list(third_graph, [first_graph, second_graph])
+    assert not isomorphic_in_list(first_graph, [Graph(n=3, directed=True)])
+    # graphs changed in place keep their node and edge count
+    third_graph.es[1]["label"] = "send"
+    assert isomorphic_in_list(third_graph, [first_graph])
+    third_graph.delete_edges([2])
+    third_graph.add_edges([(2, 1)])
+    third_graph.es[2]["label"] = "send"
+    assert not isomorphic_in_list(third_graph, [first_graph])
+    print("Done with isomorphism tests.")
+
+    unfolding_cache = UnfoldingCache(max_nodes=100)
+    for file in files:
+        graph = open_graph(file)
+        for depth in [1, 3, 2, 4, 0, 4]:
+            unfolded_graph = unfold_graph(graph, depth)
+            cached_graph = unfolding_cache.unfold(graph, depth)
+            assert cached_graph.get_edgelist() == unfolded_graph.get_edgelist(), (
+                "Unfolding cache test with depth "
+                + str(depth)
+                + " and file "
+                + file
+                + " failed."
+            )
+            assert cached_graph.es["label"] == unfolded_graph.es["label"]
+            assert cached_graph["initial"] == unfolded_graph["initial"]
+    assert (
+        unfolding_cache.stats()["hits"] > 0 and unfolding_cache.stats()["nodes"] <= 100
+    )
+    print("Done with unfolding cache tests.")
+
+    for file in files:
+        for formula in basic_formulas:
+            assert test(formula, file), (
+                "Test with formula " + formula + " and file " + file + " failed."
+            )
+    print("Done with simple tests.")
+
+    for file in files:
+        for formula in advanced_formulas:
+            assert test(formula, file), (
+                "Test with formula " + formula + " and file " + file + " failed."
+            )
+    print("Done with advanced tests.")
+
+    for file in files:
+        for formula in edgecase_formulas:
+            assert test(formula, file), (
+                "Test with formula " + formula + " and file " + file + " failed."
+            )
+    print("Done with edge case tests.")
+
+    for file in files:
+        for formula in conjunction_formulas:
+            assert test(formula, file), (
+                "Test with formula " + formula + " and file " + file + " failed."
+            )
+        for formula in conjunction_formulas[:2]:
+            assert generate_distinguished_graphs_testing(formula, file)[4], (
+                "Conjunction " + formula + " has no results for file " + file + "."
+            )
+    print("Done with conjunction tests.")
 
-for file in files:
-    for formula in advanced_formulas:
-        assert test(formula, file), (
-            "Test with formula " + formula + " and file " + file + " failed."
+    for file in files:
+        for formula in advanced_formulas + edgecase_formulas + conjunction_formulas:
+            assert test(formula, file, selective_unfolding=True), (
+                "Selective unfolding test with formula "
+                + formula
+                + " and file "
+                + file
+                + " failed."
+            )
+            unfolded_graph = generate_distinguished_graphs_testing(formula, file)[1]
+            selectively_unfolded_graph = generate_distinguished_graphs_testing(
+                formula, file, selective_unfolding=True
+            )[1]
+            assert selectively_unfolded_graph.vcount() <= unfolded_graph.vcount()
+    print("Done with selective unfolding tests.")
+
+    for file in files:
+        graph = open_graph(file)
+        minimized_graph = minimize_graph(graph)
+        assert minimized_graph.vcount() <= graph.vcount()
+        assert bisimulation_form(minimized_graph) == bisimulation_form(graph), (
+            "Minimization test with file " + file + " failed."
         )
-print("Done with advanced tests.")
+        for formula in advanced_formulas + edgecase_formulas:
+            assert test(formula, file, minimize_input=True, dedup="bisimulation"), (
+                "Bisimulation test with formula "
+                + formula
+                + " and file "
+                + file
+                + " failed."
+            )
+            satisfying_results, non_satisfying_results = generate_distinguished_graphs(
+                formula, file, dedup="bisimulation"
+            )
+            for results in (satisfying_results, non_satisfying_results):
+                forms = [bisimulation_form(result) for result in results]
+                assert len(set(forms)) == len(forms)
+
+    # a node with two bisimilar successors is minimized to a single loop
+    graph = Graph(n=3, edges=[(0, 1), (0, 2), (1, 1), (2, 0)], directed=True)
+    graph.es["label"] = ["a", "a", "a", "a"]
+    graph["initial"] = 0
+    assert minimize_graph(graph).get_edgelist() == [(0, 0)]
+    print("Done with bisimulation tests.")
+
+    for file in files:
+        for formula in basic_formulas + advanced_formulas:
+            satisfying_results, non_satisfying_results = generate_distinguished_graphs(
+                formula, file
+            )
+            for result in (
+                [open_graph(file)] + satisfying_results + non_satisfying_results
+            ):
+                lts = transform_graph_to_lts(result)
+                vector_lts = VectorLTS.from_lts(lts)
+                for checked_formula in (parse(formula), negate_formula(parse(formula))):
+                    assert vector_evaluate(checked_formula, vector_lts) == evaluate(
+                        checked_formula, lts
+                    ), (
+                        "Vector evaluation test with formula "
+                        + formula
+                        + " and file "
+                        + file
+                        + " failed."
+                    )
+
+    # isolated nodes are states of the graph but not of an LTS built from its edges
+    graph = Graph(n=3, edges=[(0, 1)], directed=True)
+    graph.es["label"] = ["a"]
+    assert vector_evaluate(parse("[a]false"), graph) == {"1", "2"}
+    assert vector_evaluate(parse("<b>true"), graph) == set()
+    print("Done with vector evaluation tests.")
+
+    for file in files:
+        for formula in advanced_formulas + edgecase_formulas:
+            satisfying_results, non_satisfying_results = generate_distinguished_graphs(
+                formula, file
+            )
+            for result in satisfying_results + non_satisfying_results:
+                lts = transform_graph_to_lts(result)
+                checker = LocalChecker(lts)
+                satisfying_vertices = evaluate(parse(formula), lts)
+                for vertex in range(result.vcount()):
+                    assert checker.check(parse(formula), str(vertex)) == (
+                        str(vertex) in satisfying_vertices
+                    ), (
+                        "Local check test with formula "
+                        + formula
+                        + " and file "
+                        + file
+                        + " failed."
+                    )
+                assert check(parse(formula), lts, str(result["initial"])) == (
+                    str(result["initial"]) in satisfying_vertices
+                )
+
+    class UnlistedLTS(IndexedLTS):
+        # states can only be looked up by name
+        @property
+        def states(self):
+            raise AssertionError("the states of the LTS were scanned")
+
+    # a chain of 2000 states, the last ones come last in lts.states
+    chain_lts = LTS()
+    unlisted_lts = UnlistedLTS.from_edge_arrays(
+        list(range(1999)), ["a"] * 1999, list(range(1, 2000))
+    )
+    for state in range(1999):
+        chain_lts.add_transition(str(state), "a", str(state + 1))
+    for lts in [chain_lts, unlisted_lts]:
+        checker = LocalChecker(lts)
+        assert checker.check(parse("<a>true"), "1998")
+        assert not checker.check(parse("<a><a>true"), "1998")
+        assert checker.check(parse("[a]false"), "1999")
+        assert not checker.check(parse("<a>true"), "2000")
+    print("Done with local check tests.")
 
-for file in files:
-    for formula in edgecase_formulas:
-        assert test(formula, file), (
-            "Test with formula " + formula + " and file " + file + " failed."
+    for file in files:
+        graph = open_graph(file)
+        lts = LTS()
+        for edge in graph.es():
+            lts.add_transition(str(edge.source), edge["label"], str(edge.target))
+        indexed_lts = transform_graph_to_lts(graph)
+        for formula in advanced_formulas + edgecase_formulas:
+            assert evaluate(parse(formula), indexed_lts) == evaluate(
+                parse(formula), lts
+            ), (
+                "Indexed LTS test with formula "
+                + formula
+                + " and file "
+                + file
+                + " failed."
+            )
+        assert {state.name for state in IndexedLTS.from_igraph(graph).states} == {
+            str(vertex) for vertex in range(graph.vcount())
+        }
+
+    indexed_lts = IndexedLTS.from_edge_arrays(
+        [0, 0, 1, 2], ["a", "a", "b", "a"], [1, 2, 2, 0]
+    )
+    indexed_lts.remove_transition_to("0", "a", "1")
+    assert evaluate(parse("<a><b>true"), indexed_lts) == set()
+    indexed_lts.remove_state("2")
+    assert not indexed_lts.get_state("0").transitions
+    assert evaluate(parse("[a]false"), indexed_lts) == {"0", "1"}
+    print("Done with indexed LTS tests.")
+
+    for file in files:
+        for formula in advanced_formulas + edgecase_formulas:
+            assert test_iter(formula, file), (
+                "Iterator test with formula "
+                + formula
+                + " and file "
+                + file
+                + " failed."
+            )
+            assert test_iter(formula, file, limit=1), (
+                "Iterator test with formula "
+                + formula
+                + " , limit 1 and file "
+                + file
+                + " failed."
+            )
+    print("Done with iterator tests.")
+
+    for file in files:
+        for formula in edgecase_formulas + conjunction_formulas:
+            budget = Budget(timeout=60)
+            results = generate_distinguished_graphs(formula, file, budget=budget)
+            assert budget.exceeded is None and budget.live_graphs == 0, (
+                "Budget test with formula " + formula + " and file " + file + " failed."
+            )
+            assert budget.results == sum(map(len, results)), (
+                "Budget test with formula " + formula + " and file " + file + " failed."
+            )
+
+            # a run that finds exactly max_results results is complete
+            result_count = budget.results
+            budget = Budget(max_results=result_count)
+            assert lists_same(
+                generate_distinguished_graphs(formula, file, budget=budget)[0],
+                results[0],
+            )
+            assert budget.results == result_count and budget.exceeded is None, (
+                "Result budget test with formula "
+                + formula
+                + " and file "
+                + file
+                + " failed."
+            )
+
+            budget = Budget(max_results=0)
+            assert generate_distinguished_graphs(formula, file, budget=budget) == (
+                [],
+                [],
+            )
+            assert budget.exceeded == ("results" if result_count else None)
+
+            budget = Budget(max_results=1)
+            results = generate_distinguished_graphs(formula, file, budget=budget)
+            assert sum(map(len, results)) <= 1 and budget.live_graphs == 0, (
+                "Result budget test with formula "
+                + formula
+                + " and file "
+                + file
+                + " failed."
+            )
+
+            budget = Budget(timeout=0)
+            assert generate_distinguished_graphs(formula, file, budget=budget) == (
+                [],
+                [],
+            ), (
+                "Deadline test with formula "
+                + formula
+                + " and file "
+                + file
+                + " failed."
+            )
+            assert budget.exceeded == "deadline"
+
+            budget = Budget()
+            budget.cancel()
+            generate_distinguished_graphs(formula, file, budget=budget)
+            assert budget.exceeded == "cancelled"
+
+            # cached results are not queued, so they do not count as live graphs
+            synthesis_cache.clear()
+            budget = Budget(max_live_graphs=0)
+            generate_distinguished_graphs(formula, file, budget=budget)
+            assert budget.exceeded == "live_graphs" and budget.live_graphs == 0
+    print("Done with budget tests.")
+
+    for file in files:
+        assert test_batch(
+            basic_formulas + advanced_formulas + edgecase_formulas, file
+        ), ("Batch test with file " + file + " failed.")
+
+    with tempfile.TemporaryDirectory() as directory:
+        formula_filename = os.path.join(directory, "formulas.txt")
+        with open(formula_filename, "w", encoding="utf-8") as formula_file:
+            formula_file.write("# comment\n<a>true\n\n[b]false\n")
+        assert len(generate_distinguished_graphs_batch(formula_filename, files[0])) == 2
+    print("Done with batch tests.")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for file in files:
+            shutil.copy("input_files/" + file + ".GraphML", directory)
+        with open(
+            os.path.join(directory, "broken.GraphML"), "w", encoding="utf-8"
+        ) as graph_file:
+            graph_file.write("<graphml>")
+        output_filename = os.path.join(directory, "results.jsonl")
+        assert run_corpus(edgecase_formulas[0], directory, output_filename, jobs=2) == 1
+        with open(output_filename, encoding="utf-8") as output_file:
+            records = [json.loads(line) for line in output_file]
+        assert len(records) == len(files) + 1
+        for record in records:
+            if record["error"] is None:
+                assert test(edgecase_formulas[0], record["file"])
+                assert len(record["non_satisfying"]) == len(
+                    generate_distinguished_graphs(edgecase_formulas[0], record["file"])[
+                        1
+                    ]
+                )
+            else:
+                assert record["file"].endswith("broken.GraphML")
+
+    corpus._corpus_worker = crashing_corpus_worker
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for file in files:
+                shutil.copy("input_files/" + file + ".GraphML", directory)
+            shutil.copy(
+                "input_files/" + files[0] + ".GraphML",
+                os.path.join(directory, "crash.GraphML"),
+            )
+            output_filename = os.path.join(directory, "results.jsonl")
+            assert (
+                run_corpus(edgecase_formulas[0], directory, output_filename, jobs=2)
+                == 1
+            )
+            with open(output_filename, encoding="utf-8") as output_file:
+                records = [json.loads(line) for line in output_file]
+            assert len(records) == len(files) + 1
+            assert [record["file"] for record in records if record["error"]] == [
+                os.path.join(directory, "crash.GraphML")
+            ]
+    finally:
+        corpus._corpus_worker = corpus_worker
+    print("Done with corpus tests.")
+
+    for depth in [1, 2, 3]:
+        graph = family_graph(3, depth, 2, 0.5)
+        assert graph.vcount() == (3 ** (depth + 1) - 1) // 2
+        assert graph.ecount() == graph.vcount() - 1 + round(0.5 * (graph.vcount() - 1))
+        assert parse(family_formula(depth, 2, 2)).depth == depth
+    records = benchmark_case(dict(BASE_PARAMETERS, depth=2), repeat=2, timeout=10)
+    assert [record["operation"] for record in records] == list(OPERATIONS)
+    assert all(
+        len(record["seconds"]) == 2 and record["exceeded"] is None for record in records
+    )
+    for _, _, _, ratio in compare_results(
+        [dict(record, sweep="depth") for record in records],
+        [dict(record, sweep="depth") for record in records],
+    ):
+        assert ratio == 1.0
+    print("Done with benchmark tests.")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for seed in range(5):
+            graph = random_lts(8, ["a", "b"], acyclic=seed % 2 == 0, seed=seed)
+            assert (
+                graph.get_edgelist()
+                == random_lts(
+                    8, ["a", "b"], acyclic=seed % 2 == 0, seed=seed
+                ).get_edgelist()
+            )
+            path = os.path.join(directory, "random_%d.GraphML" % seed)
+            graph.write_graphml(path)
+            loaded_graph = open_graph(path)
+            assert loaded_graph.get_edgelist() == graph.get_edgelist()
+            assert loaded_graph["initial"] == graph["initial"]
+
+            duplicated_graph = random_lts(
+                8, ["a", "b"], acyclic=seed % 2 == 0, duplicates=3, seed=seed
+            )
+            assert duplicated_graph.vcount() == 11
+            assert bisimulation_form(duplicated_graph) == bisimulation_form(graph)
+
+            for depth in [1, 2]:
+                formula = random_formula(graph_labels(graph), depth, seed=seed)
+                assert parse(formula).depth == depth
+                assert test_iter(formula, graph, limit=2), (
+                    "Workload test with formula "
+                    + formula
+                    + " and seed "
+                    + str(seed)
+                    + " failed."
+                )
+    print("Done with workload tests.")
+
+    with tempfile.TemporaryDirectory() as directory:
+        formula = advanced_formulas[0]
+        assert run([formula, files[0], "-o", directory, "--limit", "1"]) == 0
+        assert sorted(os.listdir(directory)) == [
+            "non_satisfying_0.graphml",
+            "satisfying_0.graphml",
+        ]
+        result = Graph.Read_GraphML(os.path.join(directory, "satisfying_0.graphml"))
+        satisfying_vertices = evaluate(parse(formula), transform_graph_to_lts(result))
+        assert str(int(result["initial"])) in satisfying_vertices
+        assert (
+            run([formula, files[0], "-o", directory, "--timeout", "0"]) == EXIT_TIMEOUT
         )
-print("Done with edge case tests.")
+
+    class CountingProcessPool(ProcessPoolExecutor):
+        created = 0
+
+        def __init__(self, *args, **kwargs):
+            CountingProcessPool.created += 1
+            super().__init__(*args, **kwargs)
+
+    main.ProcessPoolExecutor = CountingProcessPool
+    try:
+        with tempfile.TemporaryDirectory() as serial_directory:
+            with tempfile.TemporaryDirectory() as parallel_directory:
+                formula = advanced_formulas[0]
+                assert run([formula, files[1], "-o", serial_directory]) == 0
+                assert (
+                    run([formula, files[1], "-o", parallel_directory, "--jobs", "2"])
+                    == 0
+                )
+                assert CountingProcessPool.created == 1
+                assert sorted(os.listdir(parallel_directory)) == sorted(
+                    os.listdir(serial_directory)
+                )
+    finally:
+        main.ProcessPoolExecutor = ProcessPoolExecutor
+    print("Done with command line tests.")
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        for file in files:
+            for formula in advanced_formulas + edgecase_formulas:
+                assert test(formula, file, executor), (
+                    "Parallel test with formula "
+                    + formula
+                    + " and file "
+                    + file
+                    + " failed."
+                )
+                assert test(formula, file, executor, edge_parallel=True), (
+                    "Edge parallel test with formula "
+                    + formula
+                    + " and file "
+                    + file
+                    + " failed."
+                )
+
+        # the pool is reused for graphs with other labels, so the workers number the labels differently than this process
+        label_sets = [["a", "b"], ["z", "b"], ["b", "y", "a"], ["q"], ["c", "a"]]
+        with tempfile.TemporaryDirectory() as directory:
+            for seed in range(200):
+                labels = label_sets[seed % 5]
+                path = os.path.join(directory, "random_%d.GraphML" % seed)
+                random_lts(5, labels, seed=seed).write_graphml(path)
+                formula = random_formula(labels + ["z"], 2 + seed % 2, seed=seed)
+                serial_results = generate_distinguished_graphs(formula, path)
+                parallel_results = generate_distinguished_graphs(
+                    formula, path, executor=executor, fanout_threshold=0
+                )
+                assert [len(results) for results in serial_results] == [
+                    len(results) for results in parallel_results
+                ], ("Parallel dedup test with formula " + formula + " failed.")
+
+    class CountingStepPool(ProcessPoolExecutor):
+        # counts the submitted steps and the steps whose results are read
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.futures = []
+            self.used = 0
+
+        def submit(self, *args, **kwargs):
+            future = super().submit(*args, **kwargs)
+            self.futures.append(future)
+            result = future.result
+
+            def counted_result(*result_args, **result_kwargs):
+                self.used += 1
+                return result(*result_args, **result_kwargs)
+
+            future.result = counted_result
+            return future
+
+    # the initial node has six different a-successors, a necessary formula stops at the first one that changes the graph
+    edges = []
+    vertex_count = 7
+    for successor in range(1, 7):
+        edges.append((0, successor))
+        for _ in range(successor):
+            edges.append((successor, vertex_count))
+            vertex_count += 1
+    fanout_graph = Graph(n=vertex_count, edges=edges, directed=True)
+    fanout_graph.vs["id"] = ["n%d" % vertex for vertex in range(vertex_count)]
+    fanout_graph.es["label"] = ["a" if source == 0 else "b" for source, _ in edges]
+    fanout_graph.es["id"] = ["e%d" % edge for edge in range(len(edges))]
+    fanout_graph["initial"] = 0
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "fanout.GraphML")
+        fanout_graph.write_graphml(path)
+        serial_results = generate_distinguished_graphs("[a][b]false", path)
+        main.synthesis_cache.clear()
+        with CountingStepPool(max_workers=2) as executor:
+            parallel_results = generate_distinguished_graphs(
+                "[a][b]false",
+                path,
+                executor=executor,
+                fanout_threshold=0,
+                edge_parallel=True,
+            )
+            cancelled = sum(future.cancelled() for future in executor.futures)
+            assert len(executor.futures) == executor.used + cancelled
+        assert lists_same(serial_results[0], parallel_results[0])
+        assert lists_same(serial_results[1], parallel_results[1])
+    print("Done with parallel tests.")
@@ -0,0 +1,136 @@
+# pylint: disable=missing-module-docstring, c0301
+
+from array import array
+from collections import OrderedDict
+
+from graph_functions import build_unfolded_graph, graph_content_hash
+
+
+class UnfoldingCache:
+    """A bounded least recently used store of the trees built by unfold_graph.
+
+    Entries are keyed on the content hash of the input graph. Every entry keeps the tree of the deepest unfolding computed so far, level by level in breadth first order, so a shallower unfolding is a prefix of it and a deeper one only adds the levels below the current leaves. The graph itself is built from the tree on every call, with the attributes of the graph passed in, and is the same as the one returned by unfold_graph.
+
+    Parameters:
+        max_nodes (int): Maximum number of tree nodes stored in all entries together, least recently used entries are evicted beyond it
+    """
+
+    def __init__(self, max_nodes=1000000):
+        self.max_nodes = max_nodes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._node_count = 0
+
+    def unfold(self, graph, depth=1):
+        """Returns the graph unfolded up to depth, see unfold_graph.
+
+        Parameters:
+            graph (igraph.Graph): A graph
+            depth (int): Depth the graph should be unfolded to
+
+        Returns:
+            unfolded_graph (igraph.Graph): Up to depth unfolded graph combined with input graph as leaves
+        """
+
+        # the root has depth 1, so the tree of depth 0 is the same
+        depth = max(depth, 1)
+        key = graph_content_hash(graph)
+        tree = self._entries.get(key)
+        if tree is None:
+            self.misses += 1
+            tree = _Tree(graph)
+            self._entries[key] = tree
+            self._node_count += len(tree.representatives)
+        elif tree.depth() >= depth:
+            self.hits += 1
+        else:
+            # only the levels below the cached leaves are new
+            self.misses += 1
+        self._entries.move_to_end(key)
+
+        node_count = len(tree.representatives)
+        tree.extend(depth)
+        self._node_count += len(tree.representatives) - node_count
+        unfolded_graph = tree.build(graph, depth)
+
+        # the entry of this call is evicted last, and only if it is larger than max_nodes on its own
+        while self._node_count > self.max_nodes:
+            _, evicted = self._entries.popitem(last=False)
+            self._node_count -= len(evicted.representatives)
+        return unfolded_graph
+
+    def clear(self):
+        """Removes all entries and resets the counters."""
+        self._entries.clear()
+        self._node_count = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Returns the hit and miss counters, the number of stored entries and of stored tree nodes."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "nodes": self._node_count,
+        }
+
+
+class _Tree:
+    """The tree part of an unfolding, with the nodes of every level stored consecutively.
+
+    Tree node i > 0 is the target of tree edge i - 1, so the tree is stored as the parent of every node and the edge of the input graph it copies. The nodes of level k are the nodes level_offsets[k - 1] to level_offsets[k] - 1, the root is level 1.
+
+    Parameters:
+        graph (igraph.Graph): The input graph
+    """
+
+    def __init__(self, graph):
+        self.out_edges = graph.get_inclist(mode="out")
+        self.targets = array("l", [target for _, target in graph.get_edgelist()])
+        self.labels = graph.es["label"] if graph.ecount() else []
+        self.representatives = array("l", [int(graph["initial"])])
+        self.parents = array("l", [-1])
+        self.edges = array("l", [-1])
+        self.level_offsets = [0, 1]
+
+    def depth(self):
+        """Returns the number of levels."""
+        return len(self.level_offsets) - 1
+
+    def extend(self, depth):
+        """Adds the levels below the leaves until the tree has depth levels."""
+
+        while self.depth() < depth:
+            for node in range(self.level_offsets[-2], self.level_offsets[-1]):
+                for edge in self.out_edges[self.representatives[node]]:
+                    self.representatives.append(self.targets[edge])
+                    self.parents.append(node)
+                    self.edges.append(edge)
+            self.level_offsets.append(len(self.representatives))
+
+    def build(self, graph, depth):
+        """Returns the unfolded graph for the first depth levels of the tree.
+
+        Parameters:
+            graph (igraph.Graph): The input graph the tree was built for
+            depth (int): Number of levels, at most the depth of the tree
+
+        Returns:
+            unfolded_graph (igraph.Graph): The unfolded graph
+        """
+
+        node_count = self.level_offsets[depth]
+        leaf_edges = [
+            (leaf, edge)
+            for leaf in range(self.level_offsets[depth - 1], node_count)
+            for edge in self.out_edges[self.representatives[leaf]]
+        ]
+        return build_unfolded_graph(
+            graph,
+            self.representatives[:node_count].tolist(),
+            [(self.parents[node], node) for node in range(1, node_count)],
+            [self.labels[self.edges[node]] for node in range(1, node_count)],
+            leaf_edges,
+        )
@@ -247,23 +247,17 @@ def increase_formula_depth(formula, alphabet, changed=False):
     elif formula.ident in [Token.ID_NECESSARY, Token.ID_POSSIBLE]:
         formula_list = []
         for result in increase_formula_depth(formula.second, alphabet, changed):
-            new_formula = Token(formula.ident)
-            new_formula.first = formula.first
-            new_formula.second = result
+            new_formula = Token(formula.ident, formula.first, result)
             formula_list.append(new_formula)
     elif formula.ident in [Token.ID_AND, Token.ID_OR]:
         formula_list = []
         if depth_formula(formula.first) >= depth_formula(formula.second):
             for result in increase_formula_depth(formula.first, alphabet, True):
-                new_formula = Token(formula.ident)
-                new_formula.first = result
-                new_formula.second = formula.second
+                new_formula = Token(formula.ident, result, formula.second)
                 formula_list.append(new_formula)
         if depth_formula(formula.first) <= depth_formula(formula.second):
             for result in increase_formula_depth(formula.second, alphabet, True):
-                new_formula = Token(formula.ident)
-                new_formula.first = formula.first
-                new_formula.second = result
+                new_formula = Token(formula.ident, formula.first, result)
                 formula_list.append(new_formula)
     return formula_list
 
@@ -293,9 +287,7 @@ def reduce_formula_depth(formula, changed=False):
         else:
             results, changed = reduce_formula_depth(formula.second, changed)
             for result in results:
-                new_formula = Token(formula.ident)
-                new_formula.first = formula.first
-                new_formula.second = result
+                new_formula = Token(formula.ident, formula.first, result)
                 formula_list.append(new_formula)
     elif formula.ident in [Token.ID_AND, Token.ID_OR]:
         formula_list = []
@@ -304,18 +296,14 @@ def reduce_formula_depth(formula, changed=False):
         if depth_first >= depth_second:
             results, changed = reduce_formula_depth(formula.first, changed)
             for result in results:
-                new_formula = Token(formula.ident)
-                new_formula.first = result
-                new_formula.second = formula.second
+                new_formula = Token(formula.ident, result, formula.second)
                 formula_list.append(new_formula)
             if depth_first == depth_second:
                 changed = False
         if depth_first <= depth_second:
             results, changed = reduce_formula_depth(formula.second, changed)
             for result in results:
-                new_formula = Token(formula.ident)
-                new_formula.first = formula.first
-                new_formula.second = result
+                new_formula = Token(formula.ident, formula.first, result)
                 formula_list.append(new_formula)
 
     return [minimize_formula(f) for f in formula_list], changed
@@ -339,14 +327,10 @@ def generate_formulas(formula_str):
     non_satisfying_formulas = []
 
     for shallow_formula in shallow_formulas:
-        formula1 = Token(Token.ID_AND)
-        formula1.first = input_formula
-        formula1.second = shallow_formula
+        formula1 = Token(Token.ID_AND, input_formula, shallow_formula)
         satisfying_formulas.append(formula1)
 
-        formula2 = Token(Token.ID_AND)
-        formula2.first = negate_formula(input_formula)
-        formula2.second = shallow_formula
+        formula2 = Token(Token.ID_AND, negate_formula(input_formula), shallow_formula)
         non_satisfying_formulas.append(formula2)
 
     return satisfying_formulas, non_satisfying_formulas
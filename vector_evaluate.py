@@ -0,0 +1,156 @@
+# pylint: disable=missing-module-docstring, c0301
+
+from array import array
+from collections import deque
+from itertools import compress, repeat
+from operator import and_, or_
+
+from evaluate import Token
+
+# complements a state set stored as one byte of 0 or 1 per state
+_COMPLEMENT = bytes([1, 0]) + bytes(254)
+
+
+class VectorLTS:
+    """A labelled transition system stored as one sparse adjacency matrix per label.
+
+    The matrix of a label is kept in coordinate form, as the source and target states of its transitions. State sets are bitmaps with one byte of 0 or 1 per state, so the states satisfying <a>φ are one sparse matrix vector product: the bitmap of φ is gathered at the targets of the a-transitions and the transitions that hit a state of φ are scattered to their sources. Both loops run in C through map and compress.
+
+    Parameters:
+        state_names ([str]): Name of every state
+        matrices ({str: (array, array)}): Source and target states of the transitions with each label
+    """
+
+    def __init__(self, state_names, matrices):
+        self.state_names = list(state_names)
+        self.matrices = matrices
+
+    @classmethod
+    def from_lts(cls, lts):
+        """Returns the matrix form of an lts.LTS with the same states and transitions.
+
+        Parameters:
+            lts (lts.LTS): A labelled transition system
+
+        Returns:
+            vector_lts (VectorLTS): The same system with states in the order of lts.states
+        """
+
+        state_ids = {state.name: index for index, state in enumerate(lts.states)}
+        matrices = {}
+        for source, state in enumerate(lts.states):
+            # the transitions of a state are grouped by label
+            for transition in state.transitions:
+                sources, targets = matrices.setdefault(
+                    transition.name, (array("l"), array("l"))
+                )
+                sources.extend(repeat(source, len(transition.to_states)))
+                targets.extend(map(state_ids.__getitem__, transition.to_states))
+        return cls(state_ids, matrices)
+
+    @classmethod
+    def from_igraph(cls, graph):
+        """Returns the matrix form of an igraph graph with a "label" edge attribute.
+
+        Parameters:
+            graph (igraph.Graph): A graph
+
+        Returns:
+            vector_lts (VectorLTS): One state per node, named by the string of its id, and one transition per edge
+        """
+
+        matrices = {}
+        labels = graph.es["label"] if graph.ecount() else []
+        for (source, target), label in zip(graph.get_edgelist(), labels):
+            sources, targets = matrices.setdefault(label, (array("l"), array("l")))
+            sources.append(source)
+            targets.append(target)
+        return cls([str(vertex) for vertex in range(graph.vcount())], matrices)
+
+    def satisfying_bitmap(self, formula, memo=None):
+        """Returns the bitmap of the states satisfying a formula.
+
+        Parameters:
+            formula (Token): A formula
+            memo (dict): Bitmaps of already evaluated subformulas, shared subformulas are only evaluated once
+
+        Returns:
+            bitmap (bytes): One byte per state, 1 if the state satisfies the formula and 0 otherwise
+        """
+
+        if memo is None:
+            memo = {}
+        if formula in memo:
+            return memo[formula]
+
+        state_count = len(self.state_names)
+        if formula.ident == Token.ID_TRUE:
+            bitmap = b"\x01" * state_count
+        elif formula.ident == Token.ID_FALSE:
+            bitmap = bytes(state_count)
+        elif formula.ident == Token.ID_AND:
+            bitmap = bytes(
+                map(
+                    and_,
+                    self.satisfying_bitmap(formula.first, memo),
+                    self.satisfying_bitmap(formula.second, memo),
+                )
+            )
+        elif formula.ident == Token.ID_OR:
+            bitmap = bytes(
+                map(
+                    or_,
+                    self.satisfying_bitmap(formula.first, memo),
+                    self.satisfying_bitmap(formula.second, memo),
+                )
+            )
+        elif formula.ident == Token.ID_POSSIBLE:
+            bitmap = self._predecessors(
+                formula.first, self.satisfying_bitmap(formula.second, memo)
+            )
+        elif formula.ident == Token.ID_NECESSARY:
+            # [a]φ holds where no a-transition leads to a state violating φ
+            bitmap = self._predecessors(
+                formula.first,
+                self.satisfying_bitmap(formula.second, memo).translate(_COMPLEMENT),
+            ).translate(_COMPLEMENT)
+        else:
+            bitmap = bytes(state_count)
+
+        memo[formula] = bitmap
+        return bitmap
+
+    def _predecessors(self, label, bitmap):
+        # bitmap of the states with a transition with the label into a state of the input bitmap
+        result = bytearray(len(self.state_names))
+        matrix = self.matrices.get(label)
+        if matrix is None:
+            return bytes(result)
+        sources, targets = matrix
+        hits = bytes(map(bitmap.__getitem__, targets))
+        deque(map(result.__setitem__, compress(sources, hits), repeat(1)), maxlen=0)
+        return bytes(result)
+
+    def states(self, bitmap):
+        """Returns the names of the states in a bitmap."""
+        return set(compress(self.state_names, bitmap))
+
+
+def evaluate(formula, lts):
+    """Returns the names of the states satisfying a formula, like evaluate.evaluate.
+
+    Parameters:
+        formula (Token): A formula
+        lts (lts.LTS or VectorLTS or igraph.Graph): A labelled transition system, converted to a VectorLTS if needed
+
+    Returns:
+        states ({str}): Names of the states satisfying the formula
+    """
+
+    if not isinstance(lts, VectorLTS):
+        lts = (
+            VectorLTS.from_lts(lts)
+            if hasattr(lts, "states")
+            else VectorLTS.from_igraph(lts)
+        )
+    return lts.states(lts.satisfying_bitmap(formula))
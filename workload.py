@@ -0,0 +1,129 @@
+# pylint: disable=missing-module-docstring, c0301
+
+import random
+
+from igraph import Graph
+
+# relative weights of the operators of random formulas
+DEFAULT_OPERATOR_WEIGHTS = {"possible": 1, "necessary": 1, "and": 1, "or": 1}
+
+
+def random_lts(
+    state_count,
+    labels=("a", "b"),
+    out_degree_weights=(1, 2, 2, 1),
+    acyclic=False,
+    duplicates=0,
+    seed=None,
+):
+    """Returns a random labelled transition system as a graph like the ones open_graph returns.
+
+    The out-degree of every state is drawn from out_degree_weights, the label and target of every edge uniformly. Not every state has to be reachable from the initial state 0. A duplicate is a copy of a random state with the same outgoing edges, and every edge into the state gets a parallel edge with the same label into the copy, so the copy is bisimilar to the state and minimize_graph removes it again.
+
+    Parameters:
+        state_count (int): Number of states before adding the duplicates, at least 1
+        labels ([str]): Labels of the edges
+        out_degree_weights ([float]): Relative weight of every out-degree, starting with out-degree 0
+        acyclic (bool): Only add edges from a state to states with a higher id, so the graph has no cycles
+        duplicates (int): Number of bisimilar copies of states added
+        seed (int): Seed of the generator, the same seed gives the same graph
+
+    Returns:
+        graph (igraph.Graph): The graph with "id" node attributes, "label" and "id" edge attributes and initial node 0
+    """
+
+    if state_count < 1:
+        raise ValueError("state_count must be at least 1")
+    rng = random.Random(seed)
+    degrees = range(len(out_degree_weights))
+
+    edges = []
+    edge_labels = []
+    for source in range(state_count):
+        first_target = source + 1 if acyclic else 0
+        if first_target == state_count:
+            continue
+        for _ in range(rng.choices(degrees, out_degree_weights)[0]):
+            edges.append((source, rng.randrange(first_target, state_count)))
+            edge_labels.append(rng.choice(labels))
+
+    vertex_count = state_count
+    for _ in range(duplicates):
+        # the initial state is not copied, so the copies are reached through an edge
+        original = rng.randrange(1, state_count) if state_count > 1 else 0
+        copy = vertex_count
+        vertex_count += 1
+        for (source, target), label in list(zip(edges, edge_labels)):
+            if source == original:
+                # a loop of the original is a loop of the copy
+                edges.append((copy, copy if target == original else target))
+                edge_labels.append(label)
+            if target == original and source != original:
+                edges.append((source, copy))
+                edge_labels.append(label)
+
+    graph = Graph(n=vertex_count, edges=edges, directed=True)
+    graph.vs["id"] = ["n%d" % vertex for vertex in range(vertex_count)]
+    if edges:
+        graph.es["label"] = edge_labels
+        graph.es["id"] = ["e%d" % edge for edge in range(len(edges))]
+    graph["initial"] = 0
+    return graph
+
+
+def graph_labels(graph):
+    """Returns the sorted labels of the edges of a graph."""
+    return sorted(set(graph.es["label"])) if graph.ecount() else []
+
+
+def random_formula(labels, depth, operator_weights=None, seed=None):
+    """Returns a random HML formula in the syntax parse accepts.
+
+    The formula has exactly the given modal depth. Every node is drawn from operator_weights, the first operand of a conjunction or disjunction has the same modal depth as the node and the second a random lower one, and the formulas at modal depth 0 are true or false. High weights of and and or give long chains of operands, on average the sum of all weights divided by the weights of the modalities on every depth.
+
+    Parameters:
+        labels ([str]): Labels of the modalities, e.g. graph_labels of the graph the formula is meant for
+        depth (int): Modal depth
+        operator_weights (dict): Relative weights of "possible", "necessary", "and" and "or", DEFAULT_OPERATOR_WEIGHTS if None
+        seed (int): Seed of the generator, the same seed gives the same formula
+
+    Returns:
+        formula_str (str): The formula in string representation
+    """
+
+    weights = dict(DEFAULT_OPERATOR_WEIGHTS)
+    weights.update(operator_weights or {})
+    if depth > 0 and not labels:
+        raise ValueError("a formula with modalities needs at least one label")
+    if depth > 0 and weights["possible"] + weights["necessary"] <= 0:
+        raise ValueError("a formula with modalities needs possible or necessary")
+    return _random_subformula(
+        sorted(labels),
+        depth,
+        list(weights),
+        list(weights.values()),
+        random.Random(seed),
+    )
+
+
+def _random_subformula(labels, depth, operators, weights, rng):
+    # the chain of operands at the same depth ends, as long as a modality has a positive weight
+    if depth == 0:
+        return rng.choice(("true", "false"))
+
+    operator = rng.choices(operators, weights)[0]
+    if operator == "possible":
+        return "<%s>%s" % (
+            rng.choice(labels),
+            _random_subformula(labels, depth - 1, operators, weights, rng),
+        )
+    if operator == "necessary":
+        return "[%s]%s" % (
+            rng.choice(labels),
+            _random_subformula(labels, depth - 1, operators, weights, rng),
+        )
+    return "(%s %s %s)" % (
+        _random_subformula(labels, depth, operators, weights, rng),
+        operator,
+        _random_subformula(labels, rng.randrange(depth), operators, weights, rng),
+    )